@@ -1,10 +1,24 @@
 from werkzeug.routing import BaseConverter
 from flask import Flask, render_template, request, redirect, url_for, flash, jsonify, abort
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
+from bisect import bisect_left, insort
+import csv
+import io
 import os
+import queue
 import sqlite3
-from flask import g
+import threading
+import zlib
+import click
+from flask import g, has_app_context, stream_with_context
+import hashlib
+import heapq
 import json
+import math
+import time
+
+import migrate
+from pricing import PRICING_TIERS, pricing_day_type, rate_prefix, room_tiers
 
 app = Flask(__name__)
 app.secret_key = os.urandom(24)
@@ -12,10 +26,145 @@ app.secret_key = os.urandom(24)
 TAX_RATE = 0.055
 DATABASE = 'karaoke.db'
 
+# Connection pool and SQLite tuning
+DB_POOL_SIZE = 8
+DB_BUSY_TIMEOUT_MS = 5000
+DB_MMAP_SIZE = 64 * 1024 * 1024
+DB_CACHED_STATEMENTS = 256
+
+# Statements slower than this are logged with their query plan
+SLOW_QUERY_SECONDS = 0.05
+
+# /metrics histogram buckets: request latency in seconds, and SQL
+# statements per request (a high count usually means an N+1 loop)
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+                   1.0, 2.5)
+QUERY_COUNT_BUCKETS = (1, 2, 5, 10, 25, 50, 100, 250)
+
+# Idle connections waiting to be reused by get_db()
+_db_pool = queue.LifoQueue(maxsize=DB_POOL_SIZE)
+
 # Business hours: 11 AM to 1 AM
 OPEN_HOUR = 11
 CLOSE_HOUR = 1
 
+# Business hours as minutes past midnight; overnight times run past 24:00
+OPEN_MINUTE = OPEN_HOUR * 60
+CLOSE_MINUTE = (24 + CLOSE_HOUR) * 60
+MINUTES_PER_DAY = 24 * 60
+
+# Precomputed "HH:MM" <-> minutes tables covering 00:00 through 29:59, so
+# overnight times like "25:00" are plain lookups too
+TIME_TABLE_MINUTES = 30 * 60
+_MINUTES_TO_TIME = [f"{minutes // 60:02d}:{minutes % 60:02d}"
+                    for minutes in range(TIME_TABLE_MINUTES)]
+_TIME_TO_MINUTES = {time_str: minutes
+                    for minutes, time_str in enumerate(_MINUTES_TO_TIME)}
+
+# Length of a reservation row in minutes
+DURATION_MINUTES_SQL = '(end_min - start_min)'
+
+# Rollup of non-cancelled reservations per date and room; {filter} narrows
+# the rows that are recomputed
+DAILY_STATS_INSERT_SQL = f'''
+    INSERT INTO daily_stats
+    (date, room_id, reservation_count, active_count, booked_minutes)
+    SELECT date, room_id, COUNT(*), SUM(is_idle = 0),
+           SUM(CASE WHEN is_idle = 0 THEN {DURATION_MINUTES_SQL} ELSE 0 END)
+    FROM reservations
+    WHERE status != 'cancelled' {{filter}}
+    GROUP BY date, room_id
+'''
+
+# Rate schedules cover two days of minutes so overnight times fit
+SCHEDULE_MINUTES = 2 * MINUTES_PER_DAY
+
+# Upper bound on rooms x start times x durations for /api/price_quotes
+MAX_PRICE_QUOTES = 5000
+
+# Cached rooms table as (rooms version, {room_id: room dict}), see
+# get_room_catalog()
+_room_catalog = None
+
+# Per-minute rate prefix sums: (room_id, day type) -> (tiers, prefix),
+# cleared whenever the room catalog reloads
+_rate_schedules = {}
+
+# Free-slot finder resolution: one bit per SLOT_MINUTES of the business day
+SLOT_MINUTES = 15
+DAY_SLOTS = (CLOSE_MINUTE - OPEN_MINUTE) // SLOT_MINUTES
+
+# schedule_versions key bumped when a change can touch any date, such as a
+# recurring series or a migration
+ALL_DATES_VERSION_KEY = '*'
+
+# schedule_versions key bumped by the rooms table's triggers and migrations
+ROOMS_VERSION_KEY = 'rooms'
+
+# Per-date caches keep the most recently used dates, see cache_date().
+# Serialized /api/daily_reservations payloads: date -> (version, etag, body)
+_daily_cache = {}
+
+# Rendered /<date> pages: date -> (version, etag, last_modified, html)
+_page_cache = {}
+SCHEDULE_CACHE_SIZE = 64
+
+# Open /api/schedule_events streams: date -> set of listener queues. This
+# lives in the process, so run a single worker when using live updates.
+_schedule_listeners = {}
+_schedule_listeners_lock = threading.Lock()
+SCHEDULE_LISTENER_BACKLOG = 100
+SCHEDULE_KEEPALIVE_SECONDS = 15
+
+# Room occupancy bitmaps: date -> (version, {room_id: bitmap}). They are
+# small and range searches read many dates, so more of them are kept.
+_occupancy_cache = {}
+OCCUPANCY_CACHE_SIZE = 1024
+
+# Reservation fields /api/schedule can project; the default is the fields
+# shown on a reservation card
+SCHEDULE_FIELDS = (
+    'id', 'room_id', 'start_time', 'end_time', 'start_hour', 'duration',
+    'contact_name', 'contact_phone', 'contact_email', 'num_people',
+    'language', 'notes', 'status', 'total_cost'
+)
+SCHEDULE_DEFAULT_FIELDS = (
+    'id', 'start_time', 'end_time', 'start_hour', 'duration',
+    'contact_name', 'num_people', 'language'
+)
+MAX_SCHEDULE_DAYS = 93
+
+# Rows fetched per batch by streaming responses
+FETCH_BATCH_SIZE = 500
+
+RESERVATION_STATUSES = ('confirmed', 'cancelled', 'completed', 'no_show')
+
+# /api/analytics breakdowns and the longest range it aggregates
+ANALYTICS_GROUPS = ('day', 'week', 'hour', 'room', 'tier', 'status')
+MAX_ANALYTICS_DAYS = 400
+
+# Longest gap between occurrences of a recurring series
+MAX_RECURRING_INTERVAL_WEEKS = 52
+
+# Batch creation: largest accepted batch, and the fields each row needs
+MAX_BATCH_RESERVATIONS = 1000
+BATCH_REQUIRED_FIELDS = ('date', 'start_time', 'end_time', 'num_people',
+                         'contact_name', 'contact_phone', 'room_id')
+
+# /api/export columns; subtotal, tax and total are priced by quote_price().
+# Recurring series occurrences have no id and set recurring_id and
+# occurrence_date instead.
+EXPORT_COLUMNS = (
+    'id', 'date', 'room_id', 'room_name', 'start_time', 'end_time',
+    'duration_hours', 'contact_name', 'contact_phone', 'contact_email',
+    'num_people', 'language', 'status', 'is_idle', 'total_cost',
+    'deposit_paid', 'subtotal', 'tax', 'total', 'notes', 'recurring_id',
+    'occurrence_date'
+)
+
+# Days of recurring occurrences /api/export expands at a time
+EXPORT_RECURRING_DAYS = 31
+
 # Add these constants at the top of the file
 ROOMS = [
     {'id': 1, 'name': 'Room 1'},
@@ -24,38 +173,400 @@ ROOMS = [
 ]
 
 
+class Histogram:
+    """A Prometheus-style histogram with fixed upper bounds."""
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        # One count per bucket plus +Inf; cumulated when rendered
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class RouteMetrics:
+    """Everything /metrics reports about one (method, route) pair."""
+    __slots__ = ('latency', 'queries', 'sql_seconds', 'statuses')
+
+    def __init__(self):
+        self.latency = Histogram(LATENCY_BUCKETS)
+        self.queries = Histogram(QUERY_COUNT_BUCKETS)
+        self.sql_seconds = 0.0
+        self.statuses = {}
+
+
+# (method, route rule) -> RouteMetrics, plus the slow statement count
+_route_metrics = {}
+_slow_query_count = 0
+_metrics_lock = threading.Lock()
+
+EXPLAINABLE_STATEMENTS = ('SELECT', 'WITH', 'INSERT', 'UPDATE', 'DELETE', 'REPLACE')
+
+
+def record_query(conn, sql, parameters, elapsed):
+    """
+    Count a statement against the current request and log it with its
+    query plan when it took longer than SLOW_QUERY_SECONDS.
+    """
+    if has_app_context():
+        sql_stats = g.get('sql_stats')
+        if sql_stats is not None:
+            sql_stats[0] += 1
+            sql_stats[1] += elapsed
+
+    if elapsed < SLOW_QUERY_SECONDS:
+        return
+    global _slow_query_count
+    with _metrics_lock:
+        _slow_query_count += 1
+
+    plan = ''
+    if parameters is not None and sql.lstrip().upper().startswith(EXPLAINABLE_STATEMENTS):
+        try:
+            # The base class execute() isn't timed, so this doesn't recurse
+            plan = '\n'.join(f'  {row[3]}' for row in sqlite3.Connection.execute(
+                conn, 'EXPLAIN QUERY PLAN ' + sql, parameters))
+        except sqlite3.Error as e:
+            plan = f'  (no plan: {e})'
+    app.logger.warning('Slow query (%.1f ms): %s\n%s', elapsed * 1000,
+                       ' '.join(sql.split()), plan)
+
+
+class InstrumentedCursor(sqlite3.Cursor):
+    """
+    Cursor that reports every statement to record_query(). Only execute()
+    is timed, which covers preparing the statement and its first step;
+    rows streamed afterwards by fetchmany() aren't included.
+    """
+
+    def execute(self, sql, parameters=()):
+        started = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            record_query(self.connection, sql, parameters,
+                         time.perf_counter() - started)
+
+    def executemany(self, sql, seq_of_parameters):
+        started = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            record_query(self.connection, sql, None, time.perf_counter() - started)
+
+    def executescript(self, sql_script):
+        started = time.perf_counter()
+        try:
+            return super().executescript(sql_script)
+        finally:
+            record_query(self.connection, sql_script, None,
+                         time.perf_counter() - started)
+
+
+class InstrumentedConnection(sqlite3.Connection):
+    """Connection whose cursors, including execute() shortcuts, are timed."""
+
+    def cursor(self, factory=InstrumentedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+    def executescript(self, sql_script):
+        return self.cursor().executescript(sql_script)
+
+
+def open_db_connection():
+    """Open a long-lived, tuned SQLite connection for the pool."""
+    conn = sqlite3.connect(DATABASE, timeout=DB_BUSY_TIMEOUT_MS / 1000,
+                           check_same_thread=False,
+                           cached_statements=DB_CACHED_STATEMENTS,
+                           factory=InstrumentedConnection)
+    conn.row_factory = sqlite3.Row
+
+    # WAL lets readers keep going while a booking commits
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('PRAGMA synchronous=NORMAL')
+    conn.execute(f'PRAGMA busy_timeout={DB_BUSY_TIMEOUT_MS}')
+    conn.execute(f'PRAGMA mmap_size={DB_MMAP_SIZE}')
+    return conn
+
+
 def get_db():
-    """Get a database connection."""
+    """
+    Get the request's database connection.
+    Connections are borrowed from the pool on first use and handed back by
+    close_db() when the app context ends; handlers must never close them.
+    """
     if 'db' not in g:
-        g.db = sqlite3.connect(DATABASE)
-        g.db.row_factory = sqlite3.Row
+        try:
+            g.db = _db_pool.get_nowait()
+        except queue.Empty:
+            g.db = open_db_connection()
     return g.db
 
 
+def subscribe_schedule(date):
+    """Register a listener queue for live changes to a date's schedule."""
+    listener = queue.Queue(maxsize=SCHEDULE_LISTENER_BACKLOG)
+    with _schedule_listeners_lock:
+        _schedule_listeners.setdefault(date, set()).add(listener)
+    return listener
+
+
+def unsubscribe_schedule(date, listener):
+    """Remove a listener registered with subscribe_schedule()."""
+    with _schedule_listeners_lock:
+        listeners = _schedule_listeners.get(date)
+        if listeners is not None:
+            listeners.discard(listener)
+            if not listeners:
+                del _schedule_listeners[date]
+
+
+def publish_schedule_event(date, event, data):
+    """Send an event to every open schedule stream for the date."""
+    with _schedule_listeners_lock:
+        listeners = list(_schedule_listeners.get(date, ()))
+
+    message = (event, app.json.dumps(data))
+    for listener in listeners:
+        try:
+            listener.put_nowait(message)
+        except queue.Full:
+            # A client this far behind drops its backlog and reloads the day
+            while not listener.empty():
+                try:
+                    listener.get_nowait()
+                except queue.Empty:
+                    break
+            try:
+                listener.put_nowait(('reload', '{}'))
+            except queue.Full:
+                pass
+
+
+def publish_reservation_change(conn, event, reservation_id, *old_dates):
+    """
+    Broadcast a committed reservation change as a compact diff.
+    Listeners of the reservation's date get its new card state; listeners
+    of any other date it was on (or of every date, if it was deleted) get
+    a 'deleted' event.
+    """
+    rows = fetch_reservations(conn, 'SELECT * FROM reservations WHERE id = ?',
+                              (reservation_id,))
+    reservation = rows[0] if rows else None
+
+    if reservation is not None:
+        entry = schedule_entry(reservation)
+        entry.update({
+            'room_id': reservation.room_id,
+            'date': reservation.date,
+            'notes': reservation.notes,
+            'status': reservation.status,
+            'is_idle': reservation.is_idle
+        })
+        publish_schedule_event(reservation.date, event, entry)
+
+    for date in set(old_dates):
+        if reservation is None or date != reservation.date:
+            publish_schedule_event(date, 'deleted', {'id': reservation_id})
+
+
+def refresh_daily_stats(conn, *dates):
+    """
+    Recompute the daily_stats rollup rows for the given dates.
+    Call this inside the write's transaction, before committing.
+    """
+    for date in set(dates):
+        conn.execute('DELETE FROM daily_stats WHERE date = ?', (date,))
+        conn.execute(DAILY_STATS_INSERT_SQL.format(filter='AND date = ?'),
+                     (date,))
+
+    refresh_hourly_stats(conn, *dates)
+
+
+def rebuild_daily_stats(conn):
+    """Rebuild the whole daily_stats rollup from the reservations table."""
+    conn.execute('DELETE FROM daily_stats')
+    conn.execute(DAILY_STATS_INSERT_SQL.format(filter=''))
+    rebuild_hourly_stats(conn)
+
+
+def hourly_segments(conn, reservation):
+    """
+    Split a booking into {(hour, tier label): [minutes, revenue]}.
+
+    Hours run past 24 after midnight like the stored times do. Revenue is
+    the booking's stored pre-tax total_cost, spread over the segments in
+    proportion to the room's rates for them, so the rollup adds up to what
+    was charged even after rates change.
+    """
+    tiers, prefix = get_rate_schedule(conn, reservation.room_id,
+                                      pricing_day_type(reservation.date))
+    start = reservation.start_minutes
+    end = min(reservation.end_minutes, SCHEDULE_MINUTES)
+
+    # Cut at every hour and tier boundary inside the booking
+    cuts = {start, end}
+    cuts.update(range(-(-start // 60) * 60, end, 60))
+    for _, tier_start, tier_end, _ in tiers:
+        cuts.update(cut for cut in (tier_start, tier_end) if start < cut < end)
+    cuts = sorted(cuts)
+
+    segments = {}
+    for segment_start, segment_end in zip(cuts, cuts[1:]):
+        tier = next((label for label, tier_start, tier_end, _ in tiers
+                     if tier_start <= segment_start < tier_end),
+                    'Outside business hours')
+        totals = segments.setdefault((segment_start // 60, tier), [0, 0.0])
+        totals[0] += segment_end - segment_start
+        totals[1] += prefix[segment_end] - prefix[segment_start]
+
+    # Free rooms have nothing to weigh by, so split by minutes instead
+    priced = prefix[end] - prefix[start]
+    total_cost = reservation.total_cost or 0.0
+    for totals in segments.values():
+        share = totals[1] / priced if priced else totals[0] / (end - start)
+        totals[1] = total_cost * share
+    return segments
+
+
+def hourly_stats_rows(conn, reservations):
+    """Yield hourly_stats rows for Reservation objects (non-idle only)."""
+    for reservation in reservations:
+        try:
+            segments = hourly_segments(conn, reservation)
+        except ValueError:
+            # Room no longer exists, so there is nothing to price against
+            continue
+
+        for (hour, tier), (minutes, revenue) in segments.items():
+            # Each booking is counted once, in the hour it starts
+            yield (reservation.date, reservation.room_id,
+                   reservation.status or 'confirmed', hour, tier,
+                   int(hour == reservation.start_hour), minutes, revenue)
+
+
+HOURLY_STATS_INSERT_SQL = '''
+    INSERT INTO hourly_stats
+    (date, room_id, status, hour, tier, reservation_count,
+     booked_minutes, revenue)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT (date, room_id, status, hour, tier) DO UPDATE SET
+        reservation_count = reservation_count + excluded.reservation_count,
+        booked_minutes = booked_minutes + excluded.booked_minutes,
+        revenue = revenue + excluded.revenue
+'''
+
+
+def refresh_hourly_stats(conn, *dates):
+    """Recompute the hourly_stats rows for the given dates."""
+    for date in set(dates):
+        conn.execute('DELETE FROM hourly_stats WHERE date = ?', (date,))
+        conn.executemany(HOURLY_STATS_INSERT_SQL, hourly_stats_rows(
+            conn, fetch_reservations(conn, '''
+                SELECT room_id, date, start_time, end_time, start_min, end_min,
+                       status, total_cost
+                FROM reservations
+                WHERE date = ? AND is_idle = 0
+            ''', (date,))))
+
+
+def rebuild_hourly_stats(conn):
+    """Rebuild the whole hourly_stats table from the reservations table."""
+    conn.execute('DELETE FROM hourly_stats')
+    cursor = conn.cursor()
+    cursor.row_factory = reservation_factory
+    cursor.execute('''
+        SELECT room_id, date, start_time, end_time, start_min, end_min,
+               status, total_cost
+        FROM reservations
+        WHERE is_idle = 0
+    ''')
+    conn.executemany(HOURLY_STATS_INSERT_SQL,
+                     hourly_stats_rows(conn, iter_batches(cursor)))
+
+
 def init_db():
-    """Initialize the database if it doesn't exist."""
+    """Initialize the database schema and indexes."""
     db = get_db()
 
-    # Create main tables if they don't exist
-    if not os.path.exists(DATABASE):
-        with app.open_resource('schema.sql', mode='r') as f:
-            db.cursor().executescript(f.read())
-        db.commit()
+    # A brand new database gets the latest schema straight from schema.sql,
+    # so its migrations are only recorded. Existing ones are migrated first;
+    # schema.sql then adds any new tables and indexes.
+    fresh = db.execute('''
+        SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'reservations'
+    ''').fetchone() is None
+    if not fresh:
+        migrate.migrate(db, log=app.logger.info)
+
+    # schema.sql only uses IF NOT EXISTS / WHERE NOT EXISTS statements, so it
+    # is safe to run on every start and picks up newly added indexes
+    with app.open_resource('schema.sql', mode='r') as f:
+        db.cursor().executescript(f.read())
+    if fresh:
+        migrate.stamp(db)
+
+    # Populate the rollups for databases created before they existed
+    if db.execute('SELECT 1 FROM daily_stats LIMIT 1').fetchone() is None:
+        rebuild_daily_stats(db)
+    elif db.execute('SELECT 1 FROM hourly_stats LIMIT 1').fetchone() is None:
+        rebuild_hourly_stats(db)
+    db.commit()
 
 
 @app.teardown_appcontext
 def close_db(error):
-    """Close the database connection."""
+    """Return the request's database connection to the pool."""
     db = g.pop('db', None)
     if db is not None:
-        db.close()
+        # Never hand a half-finished transaction to the next request
+        if db.in_transaction:
+            db.rollback()
+        try:
+            _db_pool.put_nowait(db)
+        except queue.Full:
+            db.close()
 
 
-app.teardown_appcontext(close_db)
+@app.before_request
+def start_request_metrics():
+    g.request_started = time.perf_counter()
+    # [statements, seconds], updated by record_query()
+    g.sql_stats = [0, 0.0]
 
-# Initialize the database only if it doesn't exist
-with app.app_context():
-    init_db()
+
+@app.after_request
+def record_request_metrics(response):
+    """
+    Record the request's latency and SQL usage under its route rule, so
+    /<date> pages share one series. Streamed bodies are timed only up to
+    the point the response is returned.
+    """
+    started = g.get('request_started')
+    if started is not None:
+        elapsed = time.perf_counter() - started
+        route = request.url_rule.rule if request.url_rule else 'unmatched'
+        queries, sql_seconds = g.sql_stats
+        with _metrics_lock:
+            metrics = _route_metrics.get((request.method, route))
+            if metrics is None:
+                metrics = _route_metrics[(request.method, route)] = RouteMetrics()
+            metrics.latency.observe(elapsed)
+            metrics.queries.observe(queries)
+            metrics.sql_seconds += sql_seconds
+            metrics.statuses[response.status_code] = (
+                metrics.statuses.get(response.status_code, 0) + 1)
+    return response
 
 # --- URL Date Path Converter (MM-DD-YYYY) ---
 
@@ -81,21 +592,359 @@ def parse_time_safe(time_str):
     Safely parse time strings, including those in 24+ hour format (e.g., "25:00").
     Returns a tuple of (datetime object, is_extended_format)
     """
-    try:
-        # Try standard format first
-        return datetime.strptime(time_str, '%H:%M'), False
-    except ValueError:
-        # Handle extended format (24+ hours)
-        if ':' in time_str:
-            hours, minutes = time_str.split(':')
-            if int(hours) >= 24:
-                # Create a time for the equivalent hour on the same day
-                # (e.g., "25:00" becomes "01:00")
-                normalized_hour = int(hours) % 24
-                normalized_time_str = f"{normalized_hour:02d}:{minutes}"
-                return datetime.strptime(normalized_time_str, '%H:%M'), True
-        # If we can't parse it, re-raise the exception
-        raise
+    hours, minutes = divmod(time_to_minutes(time_str), 60)
+    # Extended times map to the equivalent hour on the same day
+    # (e.g., "25:00" becomes "01:00")
+    return datetime(1900, 1, 1, hours % 24, minutes), hours >= 24
+
+
+def time_to_minutes(time_str):
+    """Convert an "HH:MM" string (24+ hours allowed) to minutes past midnight."""
+    total_minutes = _TIME_TO_MINUTES.get(time_str)
+    if total_minutes is not None:
+        return total_minutes
+
+    # Unpadded ("9:30") or out-of-table values
+    hours, minutes = time_str.split(':')
+    hours, minutes = int(hours), int(minutes)
+    if hours < 0 or not 0 <= minutes < 60:
+        raise ValueError(f"Invalid time: {time_str!r}")
+    return hours * 60 + minutes
+
+
+def minutes_to_time(total_minutes):
+    """Format minutes past midnight as "HH:MM", keeping overnight hours as 24+."""
+    if 0 <= total_minutes < TIME_TABLE_MINUTES:
+        return _MINUTES_TO_TIME[total_minutes]
+    return f"{total_minutes // 60:02d}:{total_minutes % 60:02d}"
+
+
+def slot_minutes(start_time, end_time):
+    """
+    Return (start, end) minutes past midnight for a time slot.
+    End times at or before the start (e.g. "01:00") are moved to the next day.
+    """
+    start = time_to_minutes(start_time)
+    end = time_to_minutes(end_time)
+    if end <= start:
+        end += MINUTES_PER_DAY
+    return start, end
+
+
+# Columns a Reservation carries; anything else a query selects is ignored
+RESERVATION_COLUMNS = (
+    'id', 'room_id', 'date', 'start_time', 'end_time', 'contact_name',
+    'contact_phone', 'contact_email', 'num_people', 'language', 'status',
+    'total_cost', 'deposit_paid', 'notes', 'is_idle'
+)
+
+# Set on occurrences of a recurring series, which have no reservations row
+OCCURRENCE_FIELDS = ('recurring_id', 'occurrence_date')
+
+# Row builders of recent queries: id(cursor.description) -> (description,
+# builder), see reservation_factory()
+_reservation_builders = {}
+RESERVATION_BUILDER_CACHE_SIZE = 64
+
+
+class Reservation:
+    """
+    A reservations row with its time slot parsed once.
+
+    start_minutes/end_minutes are minutes past midnight as returned by
+    slot_minutes(), so overnight end times run past MINUTES_PER_DAY. They
+    are taken from the start_min/end_min columns when the query selects
+    them. Columns the query didn't select are None; start_time and end_time
+    must always be selected. Occurrences of a recurring series have no id
+    and carry recurring_id and their scheduled occurrence_date instead.
+    """
+    __slots__ = RESERVATION_COLUMNS + OCCURRENCE_FIELDS + (
+        'start_minutes', 'end_minutes', 'duration_minutes')
+
+    def __init__(self, fields):
+        for column in RESERVATION_COLUMNS + OCCURRENCE_FIELDS:
+            setattr(self, column, fields.get(column))
+        self.set_slot(fields.get('start_min'), fields.get('end_min'))
+
+    def set_slot(self, start_min=None, end_min=None):
+        """Normalize is_idle and set the slot, from the minutes when both are given."""
+        self.is_idle = bool(self.is_idle)
+        if start_min is not None and end_min is not None:
+            self.start_minutes, self.end_minutes = start_min, end_min
+        else:
+            self.start_minutes, self.end_minutes = slot_minutes(
+                self.start_time, self.end_time)
+        self.duration_minutes = self.end_minutes - self.start_minutes
+
+    @property
+    def start_hour(self):
+        return self.start_minutes // 60
+
+    @property
+    def duration(self):
+        """Duration in hours."""
+        return self.duration_minutes / 60
+
+
+def reservation_builder(description):
+    """
+    Return a function building a Reservation straight from a row tuple of a
+    query with this cursor description. Each field's slot is set by its
+    column position, worked out once for the whole query.
+    """
+    columns = [column[0] for column in description]
+    setters = [(getattr(Reservation, field).__set__, columns.index(field))
+               for field in RESERVATION_COLUMNS + OCCURRENCE_FIELDS if field in columns]
+    unselected = [getattr(Reservation, field).__set__
+                  for field in RESERVATION_COLUMNS + OCCURRENCE_FIELDS
+                  if field not in columns]
+    if 'start_min' in columns and 'end_min' in columns:
+        start_index, end_index = columns.index('start_min'), columns.index('end_min')
+    else:
+        start_index = end_index = None
+
+    def build(row):
+        reservation = Reservation.__new__(Reservation)
+        for setter, index in setters:
+            setter(reservation, row[index])
+        for setter in unselected:
+            setter(reservation, None)
+        if start_index is None:
+            reservation.set_slot()
+        else:
+            reservation.set_slot(row[start_index], row[end_index])
+        return reservation
+
+    return build
+
+
+def reservation_factory(cursor, row):
+    """sqlite3 row factory that builds Reservation objects."""
+    # A query's rows share one description object; keeping it in the cache
+    # keeps its id from being reused by another query's description
+    description = cursor.description
+    cached = _reservation_builders.get(id(description))
+    if cached is None or cached[0] is not description:
+        if len(_reservation_builders) >= RESERVATION_BUILDER_CACHE_SIZE:
+            _reservation_builders.clear()
+        cached = (description, reservation_builder(description))
+        _reservation_builders[id(description)] = cached
+    return cached[1](row)
+
+
+def fetch_reservations(conn, query, params=()):
+    """Run a query on the reservations table and return Reservation objects."""
+    cursor = conn.cursor()
+    cursor.row_factory = reservation_factory
+    return cursor.execute(query, params).fetchall()
+
+
+def iter_batches(cursor, size=FETCH_BATCH_SIZE):
+    """Yield an executed cursor's rows, fetching them size at a time."""
+    while True:
+        rows = cursor.fetchmany(size)
+        if not rows:
+            return
+        yield from rows
+
+
+def series_dates(series, first_day, last_day):
+    """Yield the 'YYYY-MM-DD' dates a recurring series falls on in a date range."""
+    start_day = datetime.strptime(series['start_date'], '%Y-%m-%d').date()
+    if series['end_date']:
+        last_day = min(last_day,
+                       datetime.strptime(series['end_date'], '%Y-%m-%d').date())
+
+    # Jump straight to the first occurrence on or after first_day
+    step = 7 * series['interval_weeks']
+    offset = max((first_day - start_day).days, 0)
+    day = start_day + timedelta(days=-(-offset // step) * step)
+    while day <= last_day:
+        yield day.strftime('%Y-%m-%d')
+        day += timedelta(days=step)
+
+
+def series_occurrence(series, occurrence_date, exception=None):
+    """Build the Reservation for one occurrence, applying a 'move' exception."""
+    fields = dict(series)
+    fields.update(id=None, recurring_id=series['id'], occurrence_date=occurrence_date,
+                  date=occurrence_date, status='confirmed', is_idle=0)
+    if exception is not None:
+        fields.update(date=exception['new_date'], room_id=exception['new_room_id'],
+                      start_time=exception['new_start_time'],
+                      end_time=exception['new_end_time'])
+    return Reservation(fields)
+
+
+def expand_recurring(conn, start_date, end_date, room_id=None):
+    """
+    Return the recurring series occurrences between two 'YYYY-MM-DD' dates
+    (inclusive) as Reservation objects, ordered by date, room and start.
+
+    Occurrences are computed from the rules when asked for, so an
+    open-ended series costs nothing until a date is viewed. Skipped ones
+    are left out and moved ones appear at their new date, room and time.
+    """
+    # The series running in the range, served by the (status, room_id,
+    # start_date) index, plus those with an occurrence moved into it,
+    # looked up from the moves (CROSS JOIN keeps that join order). A
+    # room's series are those booked in it or with an occurrence moved in.
+    room_filter = moved_room_filter = ''
+    room_params = []
+    if room_id is not None:
+        room_id = int(room_id)
+        room_filter, moved_room_filter = 'AND room_id = ?', 'AND moved.new_room_id = ?'
+        room_params = [room_id]
+    series_rows = conn.execute(f'''
+        SELECT * FROM recurring_reservations
+        WHERE status = 'active' {room_filter}
+        AND start_date <= ? AND (end_date IS NULL OR end_date >= ?)
+        UNION
+        SELECT series.* FROM recurring_exceptions AS moved
+        CROSS JOIN recurring_reservations AS series ON series.id = moved.recurring_id
+        WHERE moved.action = 'move' AND moved.new_date BETWEEN ? AND ?
+        {moved_room_filter} AND series.status = 'active'
+    ''', [*room_params, end_date, start_date, start_date, end_date,
+          *room_params]).fetchall()
+    if not series_rows:
+        return []
+
+    series_by_id = {series['id']: series for series in series_rows}
+    exceptions = {}
+    moved = []
+    for exception in conn.execute(f'''
+        SELECT * FROM recurring_exceptions
+        WHERE recurring_id IN ({', '.join('?' for _ in series_by_id)})
+        AND (date BETWEEN ? AND ? OR new_date BETWEEN ? AND ?)
+    ''', [*series_by_id, start_date, end_date, start_date, end_date]):
+        exceptions[(exception['recurring_id'], exception['date'])] = exception
+        if exception['action'] == 'move' and start_date <= exception['new_date'] <= end_date:
+            moved.append(exception)
+
+    first_day = datetime.strptime(start_date, '%Y-%m-%d').date()
+    last_day = datetime.strptime(end_date, '%Y-%m-%d').date()
+    occurrences = []
+    for series in series_rows:
+        for date in series_dates(series, first_day, last_day):
+            if (series['id'], date) not in exceptions:
+                occurrences.append(series_occurrence(series, date))
+    for exception in moved:
+        # A moved occurrence goes away with its original date, e.g. when
+        # the series is cut short
+        series = series_by_id[exception['recurring_id']]
+        original_day = datetime.strptime(exception['date'], '%Y-%m-%d').date()
+        if next(series_dates(series, original_day, original_day), None):
+            occurrences.append(series_occurrence(series, exception['date'], exception))
+
+    if room_id is not None:
+        # Drop occurrences moved out of the room, and the regular ones of a
+        # series fetched only for an occurrence moved into it
+        occurrences = [occurrence for occurrence in occurrences
+                       if occurrence.room_id == room_id]
+    occurrences.sort(key=lambda occurrence: (
+        occurrence.date, occurrence.room_id, occurrence.start_minutes))
+    return occurrences
+
+
+def find_conflicts(conn, room_id, date, start_time, end_time, exclude_id=None,
+                   exclude_occurrence=None):
+    """
+    Return the reservations that overlap a time slot in a room on a date.
+
+    This is the single availability check used by every write path. The
+    overlap test is an integer range predicate on start_min/end_min served
+    by the (date, room_id, start_min) index, so only that room's bookings
+    for that day are read and overnight "25:00" style times compare
+    correctly.
+    Reservations parked in the idle area never block a slot. Recurring
+    series occurrences on the date count too, except exclude_occurrence,
+    a (recurring_id, occurrence_date) pair.
+    """
+    start, end = slot_minutes(start_time, end_time)
+
+    query = '''
+        SELECT * FROM reservations
+        WHERE date = ? AND room_id = ? AND start_min < ? AND end_min > ?
+        AND is_idle = 0 AND status != 'cancelled'
+    '''
+    params = [date, room_id, end, start]
+
+    if exclude_id is not None:
+        query += ' AND id != ?'
+        params.append(exclude_id)
+
+    conflicts = fetch_reservations(conn, query, params)
+
+    for occurrence in expand_recurring(conn, date, date, room_id):
+        if ((occurrence.recurring_id, occurrence.occurrence_date) != exclude_occurrence
+                and occurrence.start_minutes < end and occurrence.end_minutes > start):
+            conflicts.append(occurrence)
+    return conflicts
+
+
+def bump_data_versions(conn, *dates):
+    """
+    Bump the schedule_versions rows of the dates a write touches, or
+    ALL_DATES_VERSION_KEY for every date. Call this inside the write's
+    transaction, so every process sees the new version together with the
+    new data and drops its cached schedules.
+    """
+    conn.executemany('''
+        INSERT INTO schedule_versions (date, version) VALUES (?, 1)
+        ON CONFLICT (date) DO UPDATE SET version = version + 1
+    ''', [(date,) for date in set(dates)])
+
+
+def data_version(conn, date):
+    """Return the version of everything a date's cached schedule depends on."""
+    versions = {row['date']: row['version'] for row in conn.execute('''
+        SELECT date, version FROM schedule_versions WHERE date IN (?, ?)
+    ''', (ALL_DATES_VERSION_KEY, date))}
+    return versions.get(ALL_DATES_VERSION_KEY, 0), versions.get(date, 0)
+
+
+def cached_date(cache, date):
+    """Return a per-date cache's entry for date, marking it recently used."""
+    entry = cache.pop(date, None)
+    if entry is not None:
+        cache[date] = entry
+    return entry
+
+
+def cache_date(cache, date, entry, size):
+    """Store a date's entry, dropping the least recently used past size dates."""
+    cache.pop(date, None)
+    while len(cache) >= size:
+        cache.pop(next(iter(cache)), None)
+    cache[date] = entry
+
+
+def invalidate_dates(*dates):
+    """
+    Drop this process's cached schedule data for dates a write touched.
+    The data is stale anyway once bump_data_versions() commits; this only
+    frees the memory and saves a version lookup.
+    """
+    for date in dates:
+        _daily_cache.pop(date, None)
+        _occupancy_cache.pop(date, None)
+        _page_cache.pop(date, None)
+
+
+def invalidate_recurring():
+    """
+    Drop every cached schedule after a recurring series changes; the write
+    must have bumped ALL_DATES_VERSION_KEY.
+    """
+    _daily_cache.clear()
+    _occupancy_cache.clear()
+    _page_cache.clear()
+
+    # Any open schedule may show the series
+    with _schedule_listeners_lock:
+        dates = list(_schedule_listeners)
+    for date in dates:
+        publish_schedule_event(date, 'reload', {})
 
 
 def is_within_business_hours(start_time, end_time):
@@ -118,59 +967,127 @@ def is_within_business_hours(start_time, end_time):
             11.0 < normalized_end <= 25.0)
 
 
-def is_room_available(room_id, start_time, end_time, exclude_id=None):
+def begin_write(conn):
+    """
+    Start an IMMEDIATE transaction on the connection.
+
+    The write lock is taken before the availability check, so no other
+    booking can commit between the check and the INSERT/UPDATE that relies
+    on it. Concurrent writers wait up to DB_BUSY_TIMEOUT_MS for the lock.
+    """
+    if conn.in_transaction:
+        conn.rollback()
+    conn.execute('BEGIN IMMEDIATE')
+
+
+def is_room_available(room_id, date, start_time, end_time, exclude_id=None):
     """Check if the room is available for the given time slot."""
-    db = get_db()
-    query = '''
-        SELECT * FROM reservations
-        WHERE room_id = ?
-        AND ((? < end_time) AND (? > start_time))
-    '''
-    params = [room_id, end_time.isoformat(), start_time.isoformat()]
+    return not find_conflicts(get_db(), room_id, date, start_time, end_time,
+                              exclude_id)
 
-    if exclude_id is not None:
-        query += ' AND id != ?'
-        params.append(exclude_id)
 
-    existing_reservations = db.execute(query, params).fetchall()
-    return len(existing_reservations) == 0
+def rooms_version(conn):
+    """Return the rooms table's version, read once per request."""
+    if has_app_context() and 'rooms_version' in g:
+        return g.rooms_version
+    row = conn.execute('SELECT version FROM schedule_versions WHERE date = ?',
+                       (ROOMS_VERSION_KEY,)).fetchone()
+    version = row[0] if row else 0
+    if has_app_context():
+        g.rooms_version = version
+    return version
 
 
-def calculate_cost(start_time, end_time, room_id):
-    db = get_db()
-    room = db.execute('SELECT hourly_rate, peak_hour_rate FROM rooms WHERE id = ?', [
-                      room_id]).fetchone()
+def get_room_catalog(conn):
+    """
+    Return {room_id: room dict} for every room. The catalog is kept until
+    the rooms table's version changes, in this or any other process.
+    """
+    global _room_catalog
+    version = rooms_version(conn)
+    if _room_catalog is None or _room_catalog[0] != version:
+        _rate_schedules.clear()
+        _room_catalog = (version, {row['id']: dict(row) for row in
+                                   conn.execute('SELECT * FROM rooms ORDER BY id')})
+    return _room_catalog[1]
 
-    # Convert times to hours for calculation
-    start_hour = int(start_time.split(':')[0])
-    end_hour = int(end_time.split(':')[0])
 
-    # Handle overnight reservations (end time already in 24+ hour format or after midnight)
-    if end_hour < start_hour:
-        end_hour += 24
+def get_bookable_rooms(conn):
+    """Return the catalog rooms customers can book (everything but Idle)."""
+    return [room for room in get_room_catalog(conn).values() if room['id'] > 0]
 
-    total_cost = 0
-    current_hour = start_hour
 
-    while current_hour < end_hour:
-        # Normalize hour for rate calculation (handle hours > 24)
-        normalized_hour = current_hour % 24
+def get_rate_schedule(conn, room_id, day_type):
+    """
+    Return (tiers, prefix) for a room and day type, cached until the rooms
+    table changes.
+
+    prefix[m] is the sum of the hourly rates of every minute before minute m
+    (minutes past midnight), so the cost of [start, end) is
+    (prefix[end] - prefix[start]) / 60 no matter how long the booking is.
+    """
+    # Checking the catalog first drops schedules built from old room rates
+    rooms = get_room_catalog(conn)
+    key = (room_id, day_type)
+    schedule = _rate_schedules.get(key)
+    if schedule is not None:
+        return schedule
+
+    room = rooms.get(room_id)
+    if room is None:
+        raise ValueError(f'Room {room_id} not found')
+
+    tiers = room_tiers(room, day_type)
+    schedule = (tiers, rate_prefix(tiers, SCHEDULE_MINUTES))
+    _rate_schedules[key] = schedule
+    return schedule
+
+
+def quote_price(conn, room_id, start_time, end_time, date=None):
+    """Price a booking and return its itemized breakdown with tax."""
+    tiers, prefix = get_rate_schedule(
+        conn, int(room_id), pricing_day_type(date))
+    start, end = slot_minutes(start_time, end_time)
+    end = min(end, SCHEDULE_MINUTES)
+
+    room_rate = (prefix[end] - prefix[start]) / 60
+
+    period_charges = []
+    tier_minutes = 0
+    for label, tier_start, tier_end, rate in tiers:
+        minutes = min(end, tier_end) - max(start, tier_start)
+        if minutes > 0:
+            tier_minutes += minutes
+            period_charges.append({
+                'time': label,
+                'rate': rate,
+                'duration': round(minutes / 60, 2),
+                'cost': round(rate * minutes / 60, 2)
+            })
+
+    # Anything left over fell outside the tiers
+    outside_minutes = (end - start) - tier_minutes
+    if outside_minutes > 0:
+        rate = tiers[-1][3]
+        period_charges.append({
+            'time': 'Outside business hours',
+            'rate': rate,
+            'duration': round(outside_minutes / 60, 2),
+            'cost': round(rate * outside_minutes / 60, 2)
+        })
 
-        # Different rate periods:
-        # Early Bird (11 AM - 6 PM): hourly_rate
-        # Prime Time (6 PM - 9 PM): peak_hour_rate
-        # Late Night (9 PM - 1 AM): peak_hour_rate
-        if 11 <= normalized_hour < 18:  # 11 AM - 6 PM
-            rate = room['hourly_rate']
-        elif 18 <= normalized_hour < 21:  # 6 PM - 9 PM
-            rate = room['peak_hour_rate']
-        else:  # 9 PM - 1 AM or 21-25
-            rate = room['peak_hour_rate']
+    tax = room_rate * TAX_RATE
+    return {
+        'room_rate': round(room_rate, 2),
+        'period_charges': period_charges,
+        'tax': round(tax, 2),
+        'total': round(room_rate + tax, 2)
+    }
 
-        total_cost += rate
-        current_hour += 1
 
-    return total_cost
+def calculate_cost(start_time, end_time, room_id, date=None):
+    """Return the pre-tax cost of a booking."""
+    return quote_price(get_db(), room_id, start_time, end_time, date)['room_rate']
 
 
 def get_rooms_with_reservations(selected_date=None):
@@ -181,103 +1098,45 @@ def get_rooms_with_reservations(selected_date=None):
     if selected_date is None:
         selected_date = datetime.now().strftime('%Y-%m-%d')
 
-    # Get all rooms
-    rooms = conn.execute('SELECT * FROM rooms').fetchall()
-
-    # Get reservations for the selected date
-    reservations = conn.execute('''
+    # Get reservations for the selected date, idle ones included, plus
+    # the day's recurring series occurrences
+    reservations = fetch_reservations(conn, '''
         SELECT * FROM reservations
         WHERE date = ?
-        ORDER BY start_time
-    ''', (selected_date,)).fetchall()
-
-    # Get idle reservations for the selected date
-    idle_reservations_ids = conn.execute('''
-        SELECT reservation_id FROM idle_reservations
-        WHERE date = ?
-    ''', (selected_date,)).fetchall()
-
-    idle_reservation_ids_set = {row['reservation_id']
-                                for row in idle_reservations_ids}
+        ORDER BY start_min
+    ''', (selected_date,))
+    reservations += expand_recurring(conn, selected_date, selected_date)
+    reservations.sort(key=lambda reservation: reservation.start_minutes)
 
-    # Organize reservations by room
     rooms_with_reservations = []
-    for room in rooms:
-        room_reservations = []
-        for reservation in reservations:
-            # Skip reservations that are in the idle area
-            if reservation['id'] in idle_reservation_ids_set:
-                continue
-
-            if reservation['room_id'] == room['id']:
-                # Calculate start hour and duration for display
-                start_time, _ = parse_time_safe(reservation['start_time'])
-                end_time, is_extended = parse_time_safe(
-                    reservation['end_time'])
-
-                # For overnight reservations, add a day to end_time for correct duration calculation
-                if is_extended or end_time <= start_time:
-                    end_time_with_day = end_time.replace(
-                        day=start_time.day + 1)
-                    duration = (end_time_with_day -
-                                start_time).total_seconds() / 3600  # in hours
-                else:
-                    # in hours
-                    duration = (end_time - start_time).total_seconds() / 3600
-
-                room_reservations.append({
-                    'id': reservation['id'],
-                    'contact_name': reservation['contact_name'],
-                    'num_people': reservation['num_people'],
-                    'start_time': reservation['start_time'],
-                    'end_time': reservation['end_time'],
-                    'start_hour': start_time.hour,
-                    'duration': duration
-                })
-
-        rooms_with_reservations.append({
+    reservations_by_room = {}
+    # The idle room (id 0) is drawn as the idle area, not as a timeline
+    for room in get_bookable_rooms(conn):
+        room_data = {
             'id': room['id'],
             'name': room['name'],
-            'reservations': room_reservations
-        })
+            'reservations': []
+        }
+        reservations_by_room[room['id']] = room_data['reservations']
+        rooms_with_reservations.append(room_data)
 
-    # Get idle reservations details
+    # Bucket reservations by room in one pass; idle ones go to the idle area
     idle_reservations = []
-    if idle_reservations_ids:
-        idle_res_list = ', '.join(['?' for _ in idle_reservations_ids])
-        idle_res_ids = [row['reservation_id'] for row in idle_reservations_ids]
-
-        if idle_res_ids:
-            idle_res_data = conn.execute(f'''
-                SELECT * FROM reservations
-                WHERE id IN ({idle_res_list})
-            ''', idle_res_ids).fetchall()
-
-            for reservation in idle_res_data:
-                start_time, _ = parse_time_safe(reservation['start_time'])
-                end_time, is_extended = parse_time_safe(
-                    reservation['end_time'])
-
-                # For overnight reservations, add a day to end_time for correct duration calculation
-                if is_extended or end_time <= start_time:
-                    end_time_with_day = end_time.replace(
-                        day=start_time.day + 1)
-                    duration = (end_time_with_day -
-                                start_time).total_seconds() / 3600  # in hours
-                else:
-                    # in hours
-                    duration = (end_time - start_time).total_seconds() / 3600
-
-                idle_reservations.append({
-                    'id': reservation['id'],
-                    'contact_name': reservation['contact_name'],
-                    'num_people': reservation['num_people'],
-                    'start_time': reservation['start_time'],
-                    'end_time': reservation['end_time'],
-                    'start_hour': start_time.hour,
-                    'duration': duration,
-                    'room_id': reservation['room_id']
-                })
+    for reservation in reservations:
+        entry = {
+            'id': reservation.id,
+            'contact_name': reservation.contact_name,
+            'num_people': reservation.num_people,
+            'start_time': reservation.start_time,
+            'end_time': reservation.end_time,
+            'start_hour': reservation.start_hour,
+            'duration': reservation.duration
+        }
+        if reservation.is_idle:
+            entry['room_id'] = reservation.room_id
+            idle_reservations.append(entry)
+        elif reservation.room_id in reservations_by_room:
+            reservations_by_room[reservation.room_id].append(entry)
 
     return {
         'rooms': rooms_with_reservations,
@@ -291,138 +1150,490 @@ def get_daily_reservations():
     if not date:
         return jsonify({'error': 'Date parameter is required'}), 400
 
-    db = get_db()
+    try:
+        datetime.strptime(date, '%Y-%m-%d')
+    except ValueError:
+        return jsonify({'error': 'Invalid date format'}), 400
 
-    # Get all rooms (excluding the idle room with id=0)
-    rooms = db.execute('''
-        SELECT id, name, capacity FROM rooms WHERE id > 0 ORDER BY capacity
-    ''').fetchall()
+    etag, body = get_daily_payload(get_db(), date)
+    response = app.response_class(body, mimetype='application/json')
+    response.set_etag(etag)
+    return response.make_conditional(request)
 
-    # Get idle reservations for this date
-    idle_reservations_ids = db.execute('''
-        SELECT reservation_id FROM idle_reservations
-        WHERE date = ?
-    ''', [date]).fetchall()
 
-    # Create a set of idle reservation IDs for faster lookup
-    idle_reservation_ids_set = {row['reservation_id']
-                                for row in idle_reservations_ids}
+@app.route('/api/schedule_events')
+def schedule_events():
+    """
+    Stream live schedule changes for a date as Server-Sent Events.
+    Events are 'created', 'updated', 'moved', 'idled', 'restored' and
+    'deleted'; the data is the changed reservation's card fields (or just
+    its id for 'deleted'). 'reload' asks a lagging client to refetch.
+    """
+    date = request.args.get('date')
+    if not date:
+        return jsonify({'error': 'Date parameter is required'}), 400
 
-    result = {'rooms': [], 'idle_reservations': []}
+    try:
+        datetime.strptime(date, '%Y-%m-%d')
+    except ValueError:
+        return jsonify({'error': 'Invalid date format'}), 400
+
+    listener = subscribe_schedule(date)
+
+    def stream():
+        try:
+            yield 'retry: 3000\n\n'
+            while True:
+                try:
+                    event, data = listener.get(
+                        timeout=SCHEDULE_KEEPALIVE_SECONDS)
+                except queue.Empty:
+                    # Comment line keeps proxies from closing an idle stream
+                    yield ': keep-alive\n\n'
+                    continue
+                yield f'event: {event}\ndata: {data}\n\n'
+        finally:
+            unsubscribe_schedule(date, listener)
+
+    return app.response_class(stream(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
 
-    for room in rooms:
-        # Get all reservations for this room and date
-        reservations = db.execute('''
-            SELECT id, start_time, end_time, contact_name, num_people, language
-            FROM reservations
-            WHERE room_id = ? AND date = ? AND status != 'cancelled'
-            ORDER BY start_time
-        ''', [room['id'], date]).fetchall()
 
+def get_daily_payload(db, date):
+    """
+    Return (etag, JSON body) of a date's schedule.
+    The prebuilt payload is served until a write touches the date.
+    """
+    version = data_version(db, date)
+    cached = cached_date(_daily_cache, date)
+    if cached is None or cached[0] != version:
+        body = app.json.dumps(build_daily_reservations(db, date))
+        etag = hashlib.sha1(body.encode('utf-8')).hexdigest()
+        cached = (version, etag, body)
+        cache_date(_daily_cache, date, cached, SCHEDULE_CACHE_SIZE)
+
+    return cached[1], cached[2]
+
+
+def schedule_entry(reservation):
+    """Return the schedule fields shown on a reservation card."""
+    entry = {
+        'id': reservation.id,
+        'start_time': reservation.start_time,
+        'end_time': reservation.end_time,
+        'start_hour': reservation.start_hour,
+        'duration': reservation.duration,
+        'contact_name': reservation.contact_name,
+        'num_people': reservation.num_people,
+        'language': reservation.language
+    }
+    add_occurrence_fields(entry, reservation)
+    return entry
+
+
+def add_occurrence_fields(entry, reservation):
+    """Identify a recurring series occurrence, which has no reservation id."""
+    if reservation.recurring_id is not None:
+        entry['recurring_id'] = reservation.recurring_id
+        entry['occurrence_date'] = reservation.occurrence_date
+
+
+def build_daily_reservations(db, date):
+    """Build the room-grouped schedule for a date with a single query."""
+    # Every room (except the idle room with id=0) from the catalog, in the
+    # order the timeline shows them
+    result = {'rooms': [], 'idle_reservations': []}
+    rooms_by_id = {}
+    for room in sorted(get_bookable_rooms(db),
+                       key=lambda room: (room['capacity'], room['id'])):
         room_data = {
             'id': room['id'],
             'name': room['name'],
             'capacity': room['capacity'],
             'reservations': []
         }
+        rooms_by_id[room['id']] = room_data
+        result['rooms'].append(room_data)
 
-        for res in reservations:
-            # Skip reservations that are in the idle area
-            if res['id'] in idle_reservation_ids_set:
-                continue
+    for reservation in fetch_reservations(db, '''
+        SELECT id, room_id, start_time, end_time, start_min, end_min,
+               contact_name, num_people, language, notes, is_idle
+        FROM reservations
+        WHERE date = ? AND status != 'cancelled'
+        ORDER BY start_min
+    ''', [date]):
+        room_data = rooms_by_id.get(reservation.room_id)
+        if room_data is None:
+            continue
+
+        res = schedule_entry(reservation)
+
+        if reservation.is_idle:
+            res['room_id'] = reservation.room_id
+            res['notes'] = reservation.notes
+            result['idle_reservations'].append(res)
+        else:
+            room_data['reservations'].append(res)
 
-            # Use our safe time parsing function
-            start_time, _ = parse_time_safe(res['start_time'])
-            end_time, is_extended = parse_time_safe(res['end_time'])
-
-            start_hour = start_time.hour
-            end_hour = end_time.hour
-
-            # Handle overnight reservations
-            if is_extended or end_hour <= start_hour:
-                end_hour += 24
-
-            room_data['reservations'].append({
-                'id': res['id'],
-                'start_time': res['start_time'],
-                'end_time': res['end_time'],
-                'start_hour': start_hour,
-                'duration': end_hour - start_hour,
-                'contact_name': res['contact_name'],
-                'num_people': res['num_people'],
-                'language': res['language']
-            })
+    # Standing bookings are expanded for the day and merged in start order
+    for occurrence in expand_recurring(db, date, date):
+        room_data = rooms_by_id.get(occurrence.room_id)
+        if room_data is not None:
+            room_data['reservations'].append(schedule_entry(occurrence))
+            room_data['reservations'].sort(key=lambda res: res['start_time'])
 
-        result['rooms'].append(room_data)
+    return result
+
+
+@app.route('/api/schedule')
+def schedule_range():
+    """
+    Stream the schedule for a date range, grouped by date and room.
+
+    Query parameters: start and end (YYYY-MM-DD, inclusive), optional rooms
+    (comma-separated ids) and fields (comma-separated SCHEDULE_FIELDS).
+    The body is gzipped when the client accepts it.
+    """
+    start_date = request.args.get('start')
+    end_date = request.args.get('end')
+    if not start_date or not end_date:
+        return jsonify({'error': 'Start and end date parameters are required'}), 400
+
+    try:
+        start_date_obj = datetime.strptime(start_date, '%Y-%m-%d').date()
+        end_date_obj = datetime.strptime(end_date, '%Y-%m-%d').date()
+    except ValueError:
+        return jsonify({'error': 'Invalid date format'}), 400
+
+    if end_date_obj < start_date_obj:
+        return jsonify({'error': 'End date must not be before start date'}), 400
+    if (end_date_obj - start_date_obj).days >= MAX_SCHEDULE_DAYS:
+        return jsonify({'error': f'Date range is limited to {MAX_SCHEDULE_DAYS} days'}), 400
+
+    try:
+        room_ids = [int(room_id) for room_id in
+                    request.args['rooms'].split(',')] if request.args.get('rooms') else None
+    except ValueError:
+        return jsonify({'error': 'Invalid rooms parameter'}), 400
+
+    fields = SCHEDULE_DEFAULT_FIELDS
+    if request.args.get('fields'):
+        fields = tuple(request.args['fields'].split(','))
+        unknown = [field for field in fields if field not in SCHEDULE_FIELDS]
+        if unknown:
+            return jsonify({'error': f"Unknown fields: {', '.join(unknown)}"}), 400
+
+    body = generate_schedule_range(get_db(), start_date_obj, end_date_obj,
+                                   room_ids, fields)
+    headers = {'Vary': 'Accept-Encoding'}
+    if 'gzip' in request.accept_encodings:
+        body = gzip_stream(body)
+        headers['Content-Encoding'] = 'gzip'
+
+    return app.response_class(stream_with_context(body),
+                              mimetype='application/json', headers=headers)
+
+
+def generate_schedule_range(conn, start_date_obj, end_date_obj, room_ids, fields):
+    """
+    Yield the JSON for a date range's schedule, one day per chunk.
+
+    All reservations come from one query in (date, room_id, start_min)
+    index order, so only one day is ever held in memory.
+    """
+    rooms = [room for room in get_bookable_rooms(conn)
+             if room_ids is None or room['id'] in room_ids]
+
+    # Only read the columns the requested fields need
+    columns = ['id', 'room_id', 'date', 'start_time', 'end_time', 'start_min',
+               'end_min', 'is_idle']
+    columns += [field for field in fields
+                if field in RESERVATION_COLUMNS and field not in columns]
+    query = f'''
+        SELECT {', '.join(columns)} FROM reservations
+        WHERE date BETWEEN ? AND ? AND status != 'cancelled'
+    '''
+    params = [start_date_obj.strftime('%Y-%m-%d'),
+              end_date_obj.strftime('%Y-%m-%d')]
+    if room_ids is not None:
+        query += f" AND room_id IN ({', '.join('?' for _ in room_ids)})"
+        params += room_ids
+    query += ' ORDER BY date, room_id, start_min'
+
+    cursor = conn.cursor()
+    cursor.row_factory = reservation_factory
+    reservations = iter_batches(cursor.execute(query, params))
+    reservation = next(reservations, None)
+
+    # Recurring series occurrences in the range, by date
+    occurrences = {}
+    for occurrence in expand_recurring(conn, params[0], params[1]):
+        occurrences.setdefault(occurrence.date, []).append(occurrence)
+
+    header = app.json.dumps({
+        'start': params[0],
+        'end': params[1],
+        'fields': list(fields),
+        'rooms': [{'id': room['id'], 'name': room['name'],
+                   'capacity': room['capacity']} for room in rooms]
+    })
+    yield header[:-1] + ', "days": ['
+
+    current_date = start_date_obj
+    while current_date <= end_date_obj:
+        date_str = current_date.strftime('%Y-%m-%d')
+        day_rooms = {room['id']: [] for room in rooms}
+        idle_reservations = []
+
+        # Rows sort by date, so this day's are next; anything sorting
+        # before it has a malformed date and is skipped
+        while reservation is not None and reservation.date <= date_str:
+            if reservation.date == date_str:
+                if reservation.is_idle:
+                    idle_reservations.append(reservation)
+                elif reservation.room_id in day_rooms:
+                    day_rooms[reservation.room_id].append(reservation)
+            reservation = next(reservations, None)
+
+        for occurrence in occurrences.get(date_str, []):
+            if occurrence.room_id in day_rooms:
+                day_rooms[occurrence.room_id].append(occurrence)
+                day_rooms[occurrence.room_id].sort(
+                    key=lambda reservation: reservation.start_minutes)
+
+        day = app.json.dumps({
+            'date': date_str,
+            'rooms': [{'id': room_id,
+                       'reservations': [project_schedule_fields(reservation, fields)
+                                        for reservation in day_reservations]}
+                      for room_id, day_reservations in day_rooms.items()],
+            'idle_reservations': [dict(project_schedule_fields(reservation, fields),
+                                       room_id=reservation.room_id)
+                                  for reservation in idle_reservations]
+        })
+        yield day if current_date == start_date_obj else ', ' + day
+        current_date += timedelta(days=1)
+
+    yield ']}'
+
+
+def project_schedule_fields(reservation, fields):
+    """Return the requested SCHEDULE_FIELDS of a reservation."""
+    entry = {field: getattr(reservation, field) for field in fields}
+    add_occurrence_fields(entry, reservation)
+    return entry
+
+
+def gzip_stream(chunks):
+    """Gzip a stream of text chunks as they are produced."""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, zlib.MAX_WBITS | 16)
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode('utf-8'))
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+@app.route('/api/export')
+def export_reservations():
+    """
+    Stream reservations for accounting as CSV (default) or NDJSON.
+
+    Query parameters: format (csv or ndjson), start and end (YYYY-MM-DD,
+    inclusive), status and rooms (comma-separated). Every filter is
+    optional; rows come out in date, room and start time order.
+
+    Recurring series occurrences are exported alongside the reservations
+    as 'confirmed' rows. Without an end date they run through the later of
+    today and the last reservation's date.
+    """
+    export_format = request.args.get('format', 'csv')
+    if export_format not in ('csv', 'ndjson'):
+        return jsonify({'error': 'Format must be csv or ndjson'}), 400
+
+    filters = []
+    params = []
+    for arg, condition in (('start', 'date >= ?'), ('end', 'date <= ?')):
+        if request.args.get(arg):
+            try:
+                datetime.strptime(request.args[arg], '%Y-%m-%d')
+            except ValueError:
+                return jsonify({'error': 'Invalid date format'}), 400
+            filters.append(condition)
+            params.append(request.args[arg])
+
+    statuses = None
+    if request.args.get('status'):
+        statuses = request.args['status'].split(',')
+        unknown = [status for status in statuses
+                   if status not in RESERVATION_STATUSES]
+        if unknown:
+            return jsonify({'error': f"Unknown status: {', '.join(unknown)}"}), 400
+        filters.append(f"status IN ({', '.join('?' for _ in statuses)})")
+        params += statuses
+
+    room_ids = None
+    if request.args.get('rooms'):
+        try:
+            room_ids = [int(room_id)
+                        for room_id in request.args['rooms'].split(',')]
+        except ValueError:
+            return jsonify({'error': 'Invalid rooms parameter'}), 400
+        filters.append(f"room_id IN ({', '.join('?' for _ in room_ids)})")
+        params += room_ids
+
+    conn = get_db()
+    occurrences = ()
+    if statuses is None or 'confirmed' in statuses:
+        occurrences = export_occurrences(conn, request.args.get('start'),
+                                         request.args.get('end'), room_ids)
+    rows = generate_export_rows(conn, filters, params, occurrences)
+    if export_format == 'csv':
+        body, mimetype = generate_csv(rows), 'text/csv'
+    else:
+        body, mimetype = generate_ndjson(rows), 'application/x-ndjson'
+
+    filename = '-'.join(['reservations'] + [request.args[arg] for arg in
+                                            ('start', 'end') if request.args.get(arg)])
+    return app.response_class(stream_with_context(body), mimetype=mimetype, headers={
+        'Content-Disposition': f'attachment; filename="{filename}.{export_format}"'
+    })
+
+
+def export_occurrences(conn, start_date=None, end_date=None, room_ids=None):
+    """
+    Yield the recurring series occurrences for an export in date, room and
+    start order, expanding EXPORT_RECURRING_DAYS at a time. Missing bounds
+    default to the first series' start and the later of today and the last
+    reservation's date.
+    """
+    first, last = conn.execute('''
+        SELECT (SELECT MIN(start_date) FROM recurring_reservations
+                WHERE status = 'active'),
+               (SELECT MAX(date) FROM reservations)
+    ''').fetchone()
+    if first is None:
+        return
+    start_date = start_date or first
+    end_date = end_date or max(last or '', datetime.now().strftime('%Y-%m-%d'))
+
+    day = datetime.strptime(start_date, '%Y-%m-%d').date()
+    last_day = datetime.strptime(end_date, '%Y-%m-%d').date()
+    while day <= last_day:
+        window_end = min(day + timedelta(days=EXPORT_RECURRING_DAYS - 1), last_day)
+        for occurrence in expand_recurring(conn, day.strftime('%Y-%m-%d'),
+                                           window_end.strftime('%Y-%m-%d')):
+            if room_ids is None or occurrence.room_id in room_ids:
+                yield occurrence
+        day = window_end + timedelta(days=1)
+
+
+def generate_export_rows(conn, filters, params, occurrences=()):
+    """
+    Yield one EXPORT_COLUMNS dict per reservation matching the filters,
+    merged in order with the given recurring series occurrences.
+    """
+    query = 'SELECT * FROM reservations'
+    if filters:
+        query += ' WHERE ' + ' AND '.join(filters)
+    query += ' ORDER BY date, room_id, start_min'
+
+    rooms = get_room_catalog(conn)
+    cursor = conn.cursor()
+    cursor.row_factory = reservation_factory
+
+    for reservation in heapq.merge(
+            iter_batches(cursor.execute(query, params)), occurrences,
+            key=lambda reservation: (reservation.date, reservation.room_id,
+                                     reservation.start_minutes)):
+        room = rooms.get(reservation.room_id)
+        try:
+            quote = quote_price(conn, reservation.room_id, reservation.start_time,
+                                reservation.end_time, reservation.date)
+        except ValueError:
+            # Room no longer exists, so there is nothing to price against
+            quote = {'room_rate': None, 'tax': None, 'total': None}
+
+        yield {
+            'id': reservation.id,
+            'date': reservation.date,
+            'room_id': reservation.room_id,
+            'room_name': room['name'] if room else None,
+            'start_time': reservation.start_time,
+            'end_time': reservation.end_time,
+            'duration_hours': reservation.duration,
+            'contact_name': reservation.contact_name,
+            'contact_phone': reservation.contact_phone,
+            'contact_email': reservation.contact_email,
+            'num_people': reservation.num_people,
+            'language': reservation.language,
+            'status': reservation.status,
+            'is_idle': int(reservation.is_idle),
+            'total_cost': reservation.total_cost,
+            'deposit_paid': reservation.deposit_paid,
+            'subtotal': quote['room_rate'],
+            'tax': quote['tax'],
+            'total': quote['total'],
+            'notes': reservation.notes,
+            'recurring_id': reservation.recurring_id,
+            'occurrence_date': reservation.occurrence_date
+        }
 
-    # Get all idle reservations for this date
-    if idle_reservation_ids_set:
-        idle_reservations = db.execute('''
-            SELECT id, start_time, end_time, contact_name, num_people, language, room_id, notes
-            FROM reservations
-            WHERE id IN ({}) AND date = ?
-            ORDER BY start_time
-        '''.format(','.join(['?'] * len(idle_reservation_ids_set))),
-            list(idle_reservation_ids_set) + [date]).fetchall()
-
-        for res in idle_reservations:
-            # Use our safe time parsing function
-            start_time, _ = parse_time_safe(res['start_time'])
-            end_time, is_extended = parse_time_safe(res['end_time'])
-
-            start_hour = start_time.hour
-            end_hour = end_time.hour
-
-            # Handle overnight reservations
-            if is_extended or end_hour <= start_hour:
-                end_hour += 24
-
-            result['idle_reservations'].append({
-                'id': res['id'],
-                'start_time': res['start_time'],
-                'end_time': res['end_time'],
-                'start_hour': start_hour,
-                'duration': end_hour - start_hour,
-                'contact_name': res['contact_name'],
-                'num_people': res['num_people'],
-                'language': res['language'],
-                'room_id': res['room_id'],
-                'notes': res['notes']
-            })
 
-    return jsonify(result)
+def generate_csv(rows):
+    """Yield CSV text for export rows, a batch of rows per chunk."""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=EXPORT_COLUMNS)
+    writer.writeheader()
+
+    for count, row in enumerate(rows, 1):
+        writer.writerow(row)
+        if count % FETCH_BATCH_SIZE == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+
+    yield buffer.getvalue()
+
+
+def generate_ndjson(rows):
+    """Yield newline-delimited JSON for export rows, one row per line."""
+    for row in rows:
+        yield json.dumps(row) + '\n'
 
 
 def get_today_stats():
-    """Get today's reservation statistics."""
+    """
+    Get today's reservation statistics from the daily_stats rollup plus
+    today's recurring series occurrences.
+    """
     conn = get_db()
     today = datetime.now().strftime('%Y-%m-%d')
 
-    total_reservations = conn.execute('''
-        SELECT COUNT(*) as count
-        FROM reservations
+    totals = conn.execute('''
+        SELECT COALESCE(SUM(reservation_count), 0) AS reservations,
+               COALESCE(SUM(booked_minutes), 0) AS minutes
+        FROM daily_stats
         WHERE date = ?
-    ''', (today,)).fetchone()['count']
-
-    total_rooms = conn.execute(
-        'SELECT COUNT(*) as count FROM rooms').fetchone()['count']
-    total_hours = 14  # 11 AM to 1 AM = 14 hours
-    total_room_hours = total_rooms * total_hours
-
-    occupied_hours = conn.execute('''
-        SELECT SUM(
-            CAST(
-                (julianday(end_time) - julianday(start_time)) * 24
-                AS INTEGER)
-        ) as hours
-        FROM reservations
-        WHERE date = ?
-    ''', (today,)).fetchone()['hours'] or 0
+    ''', (today,)).fetchone()
+    reservation_count, booked_minutes = totals['reservations'], totals['minutes']
+
+    # Recurring series occurrences aren't in the rollup
+    for occurrence in expand_recurring(conn, today, today):
+        reservation_count += 1
+        booked_minutes += occurrence.duration_minutes
+
+    # The idle room (id 0) is not bookable capacity
+    total_rooms = len(get_bookable_rooms(conn))
+    total_room_minutes = total_rooms * (CLOSE_MINUTE - OPEN_MINUTE)
 
-    occupancy_rate = round((occupied_hours / total_room_hours) * 100, 1)
+    occupancy_rate = round(
+        booked_minutes / total_room_minutes * 100, 1) if total_room_minutes else 0
 
     return {
-        'total_reservations': total_reservations,
+        'total_reservations': reservation_count,
         'occupancy_rate': occupancy_rate
     }
 
@@ -453,12 +1664,38 @@ def reservation_by_date(date_str):
         iso_date = normalize_date_path(date_str)
     except ValueError:
         abort(404)
-    data = get_rooms_with_reservations(iso_date)
-    return render_template('reservation.html',
-                           rooms=data['rooms'],
-                           idle_reservations=data['idle_reservations'],
-                           selected_date=iso_date,
-                           today_stats=get_today_stats())
+    etag, last_modified, html = get_schedule_page(iso_date)
+    response = app.response_class(html, mimetype='text/html')
+    response.set_etag(etag)
+    response.last_modified = last_modified
+    # Let browsers keep the page but revalidate it on every visit
+    response.cache_control.no_cache = True
+    return response.make_conditional(request)
+
+
+def get_schedule_page(date):
+    """
+    Return (etag, last_modified, html) of the rendered schedule page for a
+    date. The page is rendered again only after a write touches the date
+    or, since it also shows today's stats, today.
+    """
+    conn = get_db()
+    today = datetime.now().strftime('%Y-%m-%d')
+    version = (data_version(conn, date), today, data_version(conn, today))
+    cached = cached_date(_page_cache, date)
+    if cached is None or cached[0] != version:
+        data = get_rooms_with_reservations(date)
+        html = render_template('reservation.html',
+                               rooms=data['rooms'],
+                               idle_reservations=data['idle_reservations'],
+                               selected_date=date,
+                               today_stats=get_today_stats())
+        etag = hashlib.sha1(html.encode('utf-8')).hexdigest()
+        cached = (version, etag,
+                  datetime.now(timezone.utc).replace(microsecond=0), html)
+        cache_date(_page_cache, date, cached, SCHEDULE_CACHE_SIZE)
+
+    return cached[1:]
 
 
 @app.route('/reservation', methods=['GET', 'POST'])
@@ -501,126 +1738,666 @@ def reservation():
                 # Parse date and times
                 date = datetime.strptime(form_data['date'], '%Y-%m-%d').date()
 
-                # Use our safe time parsing function
-                start_time_obj, _ = parse_time_safe(form_data['start_time'])
-                end_time_obj, is_extended = parse_time_safe(
-                    form_data['end_time'])
+                # Use our safe time parsing function
+                start_time_obj, _ = parse_time_safe(form_data['start_time'])
+                end_time_obj, is_extended = parse_time_safe(
+                    form_data['end_time'])
+
+                # Extract time components
+                start_time = start_time_obj.time()
+                end_time = end_time_obj.time()
+
+                # Create datetime objects for comparison
+                start_datetime = datetime.combine(date, start_time)
+                end_datetime = datetime.combine(date, end_time)
+
+                # Handle overnight reservations
+                if is_extended or end_time <= start_time:
+                    end_datetime = end_datetime + timedelta(days=1)
+
+                # Check if the date is in the past
+                if date < datetime.now().date():
+                    error_fields.append('date')
+
+                # Check business hours (11 AM to 1 AM next day)
+                business_start = datetime.combine(
+                    date, datetime.strptime('11:00', '%H:%M').time())
+                business_end = datetime.combine(
+                    date + timedelta(days=1), datetime.strptime('01:00', '%H:%M').time())
+
+                # Ensure start time is at least 11 AM and end time is at most 1 AM next day
+                if start_datetime < business_start or end_datetime > business_end:
+                    error_fields.extend(['start_time', 'end_time'])
+
+                if error_fields:
+                    return jsonify({
+                        'error': 'Invalid reservation time. Please ensure your reservation is within business hours (11 AM - 1 AM).',
+                        'fields': error_fields
+                    }), 400
+
+                # Update form_data with datetime objects
+                form_data['start_time'] = start_datetime.strftime('%H:%M')
+
+                # For overnight reservations, store end time as 24-hour format (e.g., "25:00" for 1 AM next day)
+                if end_time <= start_time:
+                    # Convert end time to 24+ hour format for overnight reservations
+                    end_hour = end_time.hour + 24
+                    form_data['end_time'] = f"{end_hour:02d}:{end_time.minute:02d}"
+                else:
+                    form_data['end_time'] = end_datetime.strftime('%H:%M')
+
+            except ValueError as e:
+                return jsonify({
+                    'error': 'Invalid date or time format. Please use HH:MM format for times.',
+                    'fields': ['date', 'start_time', 'end_time']
+                }), 400
+
+            conn = get_db()
+            try:
+                # Check if the room is available (idle reservations are
+                # already excluded by the conflict query) while holding the
+                # write lock, so the INSERT below can't race another booking
+                begin_write(conn)
+                if find_conflicts(conn, form_data['room_id'], form_data['date'],
+                                  form_data['start_time'], form_data['end_time']):
+                    conn.rollback()
+                    return jsonify({
+                        'error': 'Room is not available for the selected time',
+                        'fields': ['room_id']
+                    }), 400
+
+                # Calculate cost
+                total_cost = calculate_cost(
+                    form_data['start_time'], form_data['end_time'],
+                    form_data['room_id'], form_data['date'])
+
+                # Create new reservation
+                start_min, end_min = slot_minutes(
+                    form_data['start_time'], form_data['end_time'])
+                cursor = conn.execute('''
+                    INSERT INTO reservations
+                    (date, start_time, end_time, start_min, end_min, num_people,
+                     contact_name, contact_phone, contact_email, room_id,
+                     total_cost, language)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ''', (form_data['date'], form_data['start_time'],
+                      form_data['end_time'], start_min, end_min,
+                      form_data['num_people'],
+                      form_data['contact_name'], form_data['contact_phone'],
+                      form_data['contact_email'], form_data['room_id'],
+                      total_cost, form_data['language']))
+
+                refresh_daily_stats(conn, form_data['date'])
+                bump_data_versions(conn, form_data['date'])
+                conn.commit()
+                invalidate_dates(form_data['date'])
+                publish_reservation_change(conn, 'created', cursor.lastrowid)
+                return jsonify({'message': 'Reservation created successfully'}), 200
+
+            except Exception as e:
+                conn.rollback()
+                return jsonify({'error': str(e)}), 500
+
+        except Exception as e:
+            return jsonify({'error': str(e)}), 400
+
+    # GET request handling - redirect to improved reservation page
+    return redirect(url_for('improved_reservation'))
+
+
+class IntervalIndex:
+    """
+    Booked [start, end) minute intervals per (date, room_id), kept sorted
+    by start so a batch of bookings can be checked in memory against the
+    database and against each other.
+    """
+
+    def __init__(self):
+        self._intervals = {}
+
+    def add(self, date, room_id, start, end, owner=-1):
+        """Record a booked interval; owner is a batch row index, -1 if stored."""
+        insort(self._intervals.setdefault((date, room_id), []),
+               (start, end, owner))
+
+    def find_overlap(self, date, room_id, start, end):
+        """Return an interval overlapping [start, end) as (start, end, owner), or None."""
+        intervals = self._intervals.get((date, room_id), [])
+        # Only intervals starting before `end` can overlap
+        for index in range(bisect_left(intervals, (end,)) - 1, -1, -1):
+            if intervals[index][1] > start:
+                return intervals[index]
+        return None
+
+
+def load_interval_index(conn, dates):
+    """
+    Build an IntervalIndex of the active reservations and recurring series
+    occurrences on the given dates.
+    """
+    booked = IntervalIndex()
+    dates = sorted(dates)
+    if dates:
+        for reservation in fetch_reservations(conn, f'''
+            SELECT room_id, date, start_time, end_time, start_min, end_min
+            FROM reservations
+            WHERE date IN ({', '.join('?' for _ in dates)})
+            AND is_idle = 0 AND status != 'cancelled'
+        ''', dates):
+            booked.add(reservation.date, reservation.room_id,
+                       reservation.start_minutes, reservation.end_minutes)
+
+        for occurrence in expand_recurring(conn, dates[0], dates[-1]):
+            if occurrence.date in dates:
+                booked.add(occurrence.date, occurrence.room_id,
+                           occurrence.start_minutes, occurrence.end_minutes)
+    return booked
+
+
+def validate_batch_row(row, rooms, earliest_date=None):
+    """
+    Check one batch or import row the way POST /reservation does.
+    Returns (booking, None) for a valid row or (None, error).
+    """
+    if not isinstance(row, dict):
+        return None, {'error': 'Each reservation must be an object', 'fields': []}
+
+    missing = [field for field in BATCH_REQUIRED_FIELDS
+               if row.get(field) in (None, '')]
+    if missing:
+        return None, {'error': 'Missing required fields', 'fields': missing}
+
+    try:
+        room_id = int(row['room_id'])
+        num_people = int(row['num_people'])
+    except (TypeError, ValueError):
+        return None, {'error': 'room_id and num_people must be whole numbers',
+                      'fields': ['room_id', 'num_people']}
+
+    if room_id <= 0 or room_id not in rooms:
+        return None, {'error': 'Unknown room', 'fields': ['room_id']}
+    if num_people <= 0:
+        return None, {'error': 'num_people must be at least 1', 'fields': ['num_people']}
+
+    try:
+        date = datetime.strptime(str(row['date']), '%Y-%m-%d').strftime('%Y-%m-%d')
+        start, end = slot_minutes(str(row['start_time']), str(row['end_time']))
+    except ValueError:
+        return None, {
+            'error': 'Invalid date or time format. Please use HH:MM format for times.',
+            'fields': ['date', 'start_time', 'end_time']
+        }
+
+    if earliest_date is not None and date < earliest_date:
+        return None, {'error': 'Reservation date is in the past', 'fields': ['date']}
+    if start < OPEN_MINUTE or end > CLOSE_MINUTE:
+        return None, {
+            'error': 'Invalid reservation time. Please ensure your reservation is within business hours (11 AM - 1 AM).',
+            'fields': ['start_time', 'end_time']
+        }
+
+    return {
+        'date': date,
+        'room_id': room_id,
+        'start': start,
+        'end': end,
+        'num_people': num_people,
+        'contact_name': row['contact_name'],
+        'contact_phone': row['contact_phone'],
+        'contact_email': row.get('contact_email') or None,
+        'language': row.get('language') or 'en',
+        'notes': row.get('notes') or None
+    }, None
+
+
+def import_reservations(conn, rows, all_or_nothing=True, allow_past=False):
+    """
+    Validate, price and insert many reservations in one transaction.
+
+    Rows are checked against each other and the stored bookings with an
+    in-memory IntervalIndex, priced from the rooms' rate prefix sums and
+    inserted with a single executemany(). In all-or-nothing mode any error
+    rejects the whole batch; otherwise the valid rows are kept.
+    Returns {'created': count, 'errors': [{'index', 'error', 'fields'}]};
+    batch overlaps also name the earlier row in 'conflicts_with'.
+    """
+    rooms = get_room_catalog(conn)
+    earliest_date = None if allow_past else datetime.now().strftime('%Y-%m-%d')
+
+    bookings = []
+    errors = []
+    for index, row in enumerate(rows):
+        booking, error = validate_batch_row(row, rooms, earliest_date)
+        if error:
+            errors.append(dict(error, index=index))
+        else:
+            bookings.append((index, booking))
+
+    # Hold the write lock from loading the index through the INSERT
+    begin_write(conn)
+    try:
+        booked = load_interval_index(
+            conn, {booking['date'] for _, booking in bookings})
+
+        accepted = []
+        for index, booking in bookings:
+            clash = booked.find_overlap(booking['date'], booking['room_id'],
+                                        booking['start'], booking['end'])
+            if clash is not None:
+                error = {
+                    'index': index,
+                    'error': 'Room is not available for the selected time',
+                    'fields': ['room_id', 'start_time', 'end_time']
+                }
+                if clash[2] >= 0:
+                    error['error'] = 'Overlaps another reservation in this batch'
+                    error['conflicts_with'] = clash[2]
+                errors.append(error)
+                continue
+            booked.add(booking['date'], booking['room_id'],
+                       booking['start'], booking['end'], owner=index)
+            accepted.append(booking)
+
+        errors.sort(key=lambda error: error['index'])
+        if not accepted or (errors and all_or_nothing):
+            conn.rollback()
+            return {'created': 0, 'errors': errors}
+
+        # Each booking's cost is two lookups into its room's rate prefix sums
+        for booking in accepted:
+            _, prefix = get_rate_schedule(conn, booking['room_id'],
+                                          pricing_day_type(booking['date']))
+            end = min(booking['end'], SCHEDULE_MINUTES)
+            booking['total_cost'] = round(
+                (prefix[end] - prefix[booking['start']]) / 60, 2)
+
+        conn.executemany('''
+            INSERT INTO reservations
+            (date, start_time, end_time, start_min, end_min, num_people,
+             contact_name, contact_phone, contact_email, room_id,
+             total_cost, language, notes)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', [(booking['date'], minutes_to_time(booking['start']),
+               minutes_to_time(booking['end']), booking['start'],
+               booking['end'], booking['num_people'],
+               booking['contact_name'], booking['contact_phone'],
+               booking['contact_email'], booking['room_id'],
+               booking['total_cost'], booking['language'], booking['notes'])
+              for booking in accepted])
+
+        dates = {booking['date'] for booking in accepted}
+        refresh_daily_stats(conn, *dates)
+        bump_data_versions(conn, *dates)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+    invalidate_dates(*dates)
+    # Open schedules refetch the day rather than receive one event per row
+    for date in dates:
+        publish_schedule_event(date, 'reload', {})
+
+    return {'created': len(accepted), 'errors': errors}
+
+
+@app.route('/api/reservations/batch', methods=['POST'])
+def batch_reservations():
+    """
+    Create many reservations in one transaction.
+    Body: {"reservations": [...], "mode": "all_or_nothing" | "best_effort"}
+    where each reservation has the POST /reservation fields (plus notes).
+    """
+    data = request.get_json(silent=True)
+    if not data or not isinstance(data.get('reservations'), list):
+        return jsonify({'error': 'A reservations list is required'}), 400
+
+    mode = data.get('mode', 'all_or_nothing')
+    if mode not in ('all_or_nothing', 'best_effort'):
+        return jsonify({'error': 'Mode must be all_or_nothing or best_effort'}), 400
+
+    if len(data['reservations']) > MAX_BATCH_RESERVATIONS:
+        return jsonify({
+            'error': f'At most {MAX_BATCH_RESERVATIONS} reservations per batch'
+        }), 400
+
+    try:
+        result = import_reservations(get_db(), data['reservations'],
+                                     all_or_nothing=mode == 'all_or_nothing')
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+    status = 400 if result['errors'] and mode == 'all_or_nothing' else 200
+    return jsonify(result), status
+
+
+@app.cli.command('import-reservations')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--best-effort', is_flag=True,
+              help='Import the valid rows even if other rows fail.')
+@click.option('--allow-past', is_flag=True,
+              help='Accept reservations dated before today.')
+def import_reservations_command(path, best_effort, allow_past):
+    """Import reservations from a CSV file or a JSON list."""
+    with open(path, newline='', encoding='utf-8') as f:
+        if path.lower().endswith('.json'):
+            rows = json.load(f)
+            if isinstance(rows, dict):
+                rows = rows.get('reservations', [])
+        else:
+            rows = list(csv.DictReader(f))
+
+    result = import_reservations(get_db(), rows, all_or_nothing=not best_effort,
+                                 allow_past=allow_past)
 
-                # Extract time components
-                start_time = start_time_obj.time()
-                end_time = end_time_obj.time()
+    for error in result['errors']:
+        fields = ', '.join(error['fields'])
+        message = f"row {error['index'] + 1}: {error['error']}"
+        if 'conflicts_with' in error:
+            message += f" (row {error['conflicts_with'] + 1})"
+        elif fields:
+            message += f' ({fields})'
+        click.echo(message, err=True)
+    click.echo(f"Imported {result['created']} of {len(rows)} reservations")
 
-                # Create datetime objects for comparison
-                start_datetime = datetime.combine(date, start_time)
-                end_datetime = datetime.combine(date, end_time)
+    if result['errors'] and not best_effort:
+        raise SystemExit(1)
 
-                # Handle overnight reservations
-                if is_extended or end_time <= start_time:
-                    end_datetime = end_datetime + timedelta(days=1)
 
-                # Check if the date is in the past
-                if date < datetime.now().date():
-                    error_fields.append('date')
+def find_series_conflicts(conn, room_id, start_date, end_date, interval_weeks,
+                          start, end, limit=10):
+    """
+    Return up to `limit` dates on which a new recurring series would overlap
+    a stored reservation or another series in the room.
+
+    Stored reservations are matched to the series' dates in SQL by their
+    day offset from start_date, and other series by stepping through one
+    shared period, so no occurrences are materialized. Skipped occurrences
+    of other series still count, since the clash would come back on a
+    later date anyway.
+    """
+    step = 7 * interval_weeks
+    dates = set()
 
-                # Check business hours (11 AM to 1 AM next day)
-                business_start = datetime.combine(
-                    date, datetime.strptime('11:00', '%H:%M').time())
-                business_end = datetime.combine(
-                    date + timedelta(days=1), datetime.strptime('01:00', '%H:%M').time())
+    query = '''
+        SELECT DISTINCT date FROM reservations
+        WHERE date >= ? AND room_id = ? AND is_idle = 0 AND status != 'cancelled'
+        AND start_min < ? AND end_min > ?
+        AND CAST(julianday(date) - julianday(?) AS INTEGER) % ? = 0
+    '''
+    params = [start_date, room_id, end, start, start_date, step]
+    if end_date:
+        query += ' AND date <= ?'
+        params.append(end_date)
+    dates.update(row['date'] for row in conn.execute(query, params))
+
+    new_series = {'start_date': start_date, 'end_date': end_date,
+                  'interval_weeks': interval_weeks}
+    first_day = datetime.strptime(start_date, '%Y-%m-%d').date()
+    for other in conn.execute('''
+        SELECT * FROM recurring_reservations
+        WHERE status = 'active' AND room_id = ?
+        AND (end_date IS NULL OR end_date >= ?)
+    ''', (room_id, start_date)):
+        other_start, other_end = slot_minutes(other['start_time'], other['end_time'])
+        if not (other_start < end and other_end > start):
+            continue
+
+        # Both series repeat every lcm of their steps, so the first shared
+        # period holds their first common date if they have one
+        other_step = 7 * other['interval_weeks']
+        window_start = max(first_day,
+                           datetime.strptime(other['start_date'], '%Y-%m-%d').date())
+        window_end = window_start + timedelta(
+            days=step * other_step // math.gcd(step, other_step))
+        other_dates = set(series_dates(other, window_start, window_end))
+        for date in series_dates(new_series, window_start, window_end):
+            if date in other_dates:
+                dates.add(date)
+                break
+
+    # Occurrences of other series moved into this room
+    for moved in conn.execute('''
+        SELECT e.new_date, e.new_start_time, e.new_end_time
+        FROM recurring_exceptions e
+        JOIN recurring_reservations r ON r.id = e.recurring_id
+        WHERE r.status = 'active' AND e.action = 'move'
+        AND e.new_room_id = ? AND e.new_date >= ?
+    ''', (room_id, start_date)):
+        moved_day = datetime.strptime(moved['new_date'], '%Y-%m-%d').date()
+        moved_start, moved_end = slot_minutes(moved['new_start_time'],
+                                              moved['new_end_time'])
+        if (next(series_dates(new_series, moved_day, moved_day), None)
+                and moved_start < end and moved_end > start):
+            dates.add(moved['new_date'])
+
+    return sorted(dates)[:limit]
+
+
+@app.route('/api/recurring_reservations', methods=['POST'])
+def create_recurring_reservation():
+    """
+    Create a standing booking that repeats every interval_weeks weeks
+    (default 1) on start_date's weekday, until end_date if one is given.
+    Takes the POST /reservation fields with start_date in place of date.
+    """
+    data = request.get_json(silent=True)
+    if not data:
+        return jsonify({'error': 'No data provided'}), 400
 
-                # Ensure start time is at least 11 AM and end time is at most 1 AM next day
-                if start_datetime < business_start or end_datetime > business_end:
-                    error_fields.extend(['start_time', 'end_time'])
+    conn = get_db()
+    booking, error = validate_batch_row(
+        dict(data, date=data.get('start_date')), get_room_catalog(conn),
+        datetime.now().strftime('%Y-%m-%d'))
+    if error:
+        error['fields'] = ['start_date' if field == 'date' else field
+                           for field in error['fields']]
+        return jsonify(error), 400
 
-                if error_fields:
-                    return jsonify({
-                        'error': 'Invalid reservation time. Please ensure your reservation is within business hours (11 AM - 1 AM).',
-                        'fields': error_fields
-                    }), 400
+    try:
+        interval_weeks = int(data.get('interval_weeks', 1))
+        end_date = data.get('end_date') or None
+        if end_date:
+            end_date = datetime.strptime(end_date, '%Y-%m-%d').strftime('%Y-%m-%d')
+    except (TypeError, ValueError):
+        return jsonify({'error': 'Invalid interval_weeks or end_date',
+                        'fields': ['interval_weeks', 'end_date']}), 400
+
+    if not 0 < interval_weeks <= MAX_RECURRING_INTERVAL_WEEKS:
+        return jsonify({
+            'error': f'interval_weeks must be between 1 and {MAX_RECURRING_INTERVAL_WEEKS}',
+            'fields': ['interval_weeks']
+        }), 400
+    if end_date and end_date < booking['date']:
+        return jsonify({'error': 'end_date must not be before start_date',
+                        'fields': ['end_date']}), 400
+
+    start_time = minutes_to_time(booking['start'])
+    end_time = minutes_to_time(booking['end'])
+    try:
+        # Hold the write lock from the conflict check through the INSERT
+        begin_write(conn)
+        conflict_dates = find_series_conflicts(
+            conn, booking['room_id'], booking['date'], end_date, interval_weeks,
+            booking['start'], booking['end'])
+        if conflict_dates:
+            conn.rollback()
+            return jsonify({
+                'error': 'The room is already booked at that time on some of these dates',
+                'conflict': True,
+                'dates': conflict_dates
+            }), 409
+
+        total_cost = quote_price(conn, booking['room_id'], start_time, end_time,
+                                 booking['date'])['room_rate']
+        cursor = conn.execute('''
+            INSERT INTO recurring_reservations
+            (room_id, start_date, end_date, interval_weeks, start_time, end_time,
+             contact_name, contact_phone, contact_email, num_people, language,
+             notes, total_cost)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', (booking['room_id'], booking['date'], end_date, interval_weeks,
+              start_time, end_time, booking['contact_name'], booking['contact_phone'],
+              booking['contact_email'], booking['num_people'], booking['language'],
+              booking['notes'], total_cost))
+        bump_data_versions(conn, ALL_DATES_VERSION_KEY)
+        conn.commit()
+    except Exception as e:
+        conn.rollback()
+        return jsonify({'error': str(e)}), 500
 
-                # Update form_data with datetime objects
-                form_data['start_time'] = start_datetime.strftime('%H:%M')
+    invalidate_recurring()
+    return jsonify({'message': 'Recurring reservation created successfully',
+                    'id': cursor.lastrowid}), 200
 
-                # For overnight reservations, store end time as 24-hour format (e.g., "25:00" for 1 AM next day)
-                if end_time <= start_time:
-                    # Convert end time to 24+ hour format for overnight reservations
-                    end_hour = end_time.hour + 24
-                    form_data['end_time'] = f"{end_hour:02d}:{end_time.minute:02d}"
-                else:
-                    form_data['end_time'] = end_datetime.strftime('%H:%M')
 
-            except ValueError as e:
-                return jsonify({
-                    'error': 'Invalid date or time format. Please use HH:MM format for times.',
-                    'fields': ['date', 'start_time', 'end_time']
-                }), 400
+@app.route('/api/recurring_reservations/<int:recurring_id>')
+def get_recurring_reservation(recurring_id):
+    """Return a recurring series with its skipped and moved occurrences."""
+    conn = get_db()
+    series = conn.execute('SELECT * FROM recurring_reservations WHERE id = ?',
+                          (recurring_id,)).fetchone()
+    if series is None:
+        return jsonify({'error': 'Recurring reservation not found'}), 404
+
+    exceptions = conn.execute('''
+        SELECT date, action, new_date, new_room_id, new_start_time, new_end_time
+        FROM recurring_exceptions
+        WHERE recurring_id = ?
+        ORDER BY date
+    ''', (recurring_id,)).fetchall()
 
-            conn = get_db()
+    return jsonify({
+        'series': dict(series),
+        'exceptions': [dict(exception) for exception in exceptions]
+    })
+
+
+@app.route('/api/recurring_reservations/<int:recurring_id>/cancel', methods=['POST'])
+def cancel_recurring_reservation(recurring_id):
+    """
+    Cancel a recurring series, or with {"from_date": ...} only the
+    occurrences on and after that date.
+    """
+    data = request.get_json(silent=True) or {}
+    conn = get_db()
+    try:
+        series = conn.execute('SELECT * FROM recurring_reservations WHERE id = ?',
+                              (recurring_id,)).fetchone()
+        if series is None:
+            return jsonify({'error': 'Recurring reservation not found'}), 404
+
+        end_date = None
+        if data.get('from_date'):
             try:
-                # Check if the room is available
-                # First, get all reservations that might conflict
-                potential_conflicts = conn.execute('''
-                    SELECT r.* FROM reservations r
-                    WHERE r.room_id = ? AND r.date = ? AND
-                    ((r.start_time <= ? AND r.end_time > ?) OR
-                     (r.start_time < ? AND r.end_time >= ?) OR
-                     (r.start_time >= ? AND r.end_time <= ?))
-                ''', (form_data['room_id'], form_data['date'],
-                      form_data['start_time'], form_data['start_time'],
-                      form_data['end_time'], form_data['end_time'],
-                      form_data['start_time'], form_data['end_time'])).fetchall()
-
-                # Check if any of these reservations are NOT in the idle area
-                conflict_exists = False
-                for res in potential_conflicts:
-                    # Check if this reservation is in the idle area
-                    idle_check = conn.execute('''
-                        SELECT * FROM idle_reservations
-                        WHERE reservation_id = ? AND date = ?
-                    ''', (res['id'], form_data['date'])).fetchone()
-
-                    # If it's not in the idle area, we have a conflict
-                    if not idle_check:
-                        conflict_exists = True
-                        break
-
-                if conflict_exists:
-                    return jsonify({
-                        'error': 'Room is not available for the selected time',
-                        'fields': ['room_id']
-                    }), 400
+                from_day = datetime.strptime(data['from_date'], '%Y-%m-%d').date()
+            except ValueError:
+                return jsonify({'error': 'Invalid date format'}), 400
+            end_date = (from_day - timedelta(days=1)).strftime('%Y-%m-%d')
 
-                # Calculate cost
-                total_cost = calculate_cost(
-                    form_data['start_time'], form_data['end_time'], form_data['room_id'])
+        if end_date and end_date >= series['start_date']:
+            # Keep the occurrences before from_date
+            conn.execute('''
+                UPDATE recurring_reservations SET end_date = ?
+                WHERE id = ? AND (end_date IS NULL OR end_date > ?)
+            ''', (end_date, recurring_id, end_date))
+        else:
+            conn.execute('''
+                UPDATE recurring_reservations SET status = 'cancelled'
+                WHERE id = ?
+            ''', (recurring_id,))
+        bump_data_versions(conn, ALL_DATES_VERSION_KEY)
+        conn.commit()
+    except Exception as e:
+        conn.rollback()
+        return jsonify({'error': str(e)}), 500
 
-                # Create new reservation
-                conn.execute('''
-                    INSERT INTO reservations
-                    (date, start_time, end_time, num_people,
-                     contact_name, contact_phone, contact_email, room_id,
-                     total_cost, language)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                ''', (form_data['date'], form_data['start_time'],
-                      form_data['end_time'], form_data['num_people'],
-                      form_data['contact_name'], form_data['contact_phone'],
-                      form_data['contact_email'], form_data['room_id'],
-                      total_cost, form_data['language']))
+    invalidate_recurring()
+    return jsonify({'success': True}), 200
 
-                conn.commit()
-                return jsonify({'message': 'Reservation created successfully'}), 200
 
-            except Exception as e:
+@app.route('/api/recurring_reservations/<int:recurring_id>/exceptions', methods=['POST'])
+def add_recurring_exception(recurring_id):
+    """
+    Skip or move a single occurrence of a recurring series.
+    Body: {"date": occurrence date, "action": "skip" | "move"} plus, for a
+    move, any of new_date, new_room_id, new_start_time and new_end_time
+    (each defaults to the occurrence's current value).
+    """
+    data = request.get_json(silent=True)
+    if not data:
+        return jsonify({'error': 'No data provided'}), 400
+    if data.get('action') not in ('skip', 'move'):
+        return jsonify({'error': 'Action must be skip or move'}), 400
+
+    conn = get_db()
+    try:
+        # Hold the write lock from the conflict check through the INSERT
+        begin_write(conn)
+        series = conn.execute('''
+            SELECT * FROM recurring_reservations
+            WHERE id = ? AND status = 'active'
+        ''', (recurring_id,)).fetchone()
+        if series is None:
+            conn.rollback()
+            return jsonify({'error': 'Recurring reservation not found'}), 404
+
+        date = data.get('date')
+        try:
+            day = datetime.strptime(date, '%Y-%m-%d').date()
+        except (TypeError, ValueError):
+            conn.rollback()
+            return jsonify({'error': 'Invalid date format'}), 400
+        if next(series_dates(series, day, day), None) is None:
+            conn.rollback()
+            return jsonify({'error': 'Not an occurrence of this series',
+                            'fields': ['date']}), 400
+
+        previous = conn.execute('''
+            SELECT new_date FROM recurring_exceptions
+            WHERE recurring_id = ? AND date = ?
+        ''', (recurring_id, date)).fetchone()
+
+        moved = (None, None, None, None)
+        if data['action'] == 'move':
+            booking, error = validate_batch_row(dict(
+                dict(series),
+                date=data.get('new_date', date),
+                room_id=data.get('new_room_id', series['room_id']),
+                start_time=data.get('new_start_time', series['start_time']),
+                end_time=data.get('new_end_time', series['end_time'])
+            ), get_room_catalog(conn), datetime.now().strftime('%Y-%m-%d'))
+            if error:
                 conn.rollback()
-                return jsonify({'error': str(e)}), 500
-            finally:
-                conn.close()
+                return jsonify(error), 400
 
-        except Exception as e:
-            return jsonify({'error': str(e)}), 400
+            moved = (booking['date'], booking['room_id'],
+                     minutes_to_time(booking['start']), minutes_to_time(booking['end']))
+            if find_conflicts(conn, booking['room_id'], booking['date'], moved[2],
+                              moved[3], exclude_occurrence=(recurring_id, date)):
+                conn.rollback()
+                return jsonify({
+                    'error': 'The selected time slot is already occupied',
+                    'conflict': True
+                }), 409
 
-    # GET request handling - redirect to improved reservation page
-    return redirect(url_for('improved_reservation'))
+        conn.execute('''
+            INSERT OR REPLACE INTO recurring_exceptions
+            (recurring_id, date, action, new_date, new_room_id,
+             new_start_time, new_end_time)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        ''', (recurring_id, date, data['action'], *moved))
+        dates = {date, moved[0], previous['new_date'] if previous else None} - {None}
+        bump_data_versions(conn, *dates)
+        conn.commit()
+    except Exception as e:
+        conn.rollback()
+        return jsonify({'error': str(e)}), 500
+
+    invalidate_dates(*dates)
+    for changed_date in dates:
+        publish_schedule_event(changed_date, 'reload', {})
+    return jsonify({'success': True}), 200
 
 
 @app.route('/get_reservation/<int:reservation_id>')
@@ -628,7 +2405,6 @@ def get_reservation(reservation_id):
     conn = get_db()
     reservation = conn.execute(
         'SELECT * FROM reservations WHERE id = ?', (reservation_id,)).fetchone()
-    conn.close()
 
     if reservation is None:
         return jsonify({'error': 'Reservation not found'}), 404
@@ -668,34 +2444,51 @@ def delete_reservation(reservation_id):
         # Delete the reservation
         conn.execute('DELETE FROM reservations WHERE id = ?',
                      (reservation_id,))
+        refresh_daily_stats(conn, reservation['date'])
+        bump_data_versions(conn, reservation['date'])
         conn.commit()
+        invalidate_dates(reservation['date'])
+        publish_reservation_change(
+            conn, 'deleted', reservation_id, reservation['date'])
 
         return jsonify({'message': 'Reservation deleted successfully', 'id': reservation_id}), 200
     except Exception as e:
         conn.rollback()
         return jsonify({'error': str(e)}), 500
-    finally:
-        conn.close()
 
 
 @app.route('/update_reservation/<int:reservation_id>', methods=['POST'])
 def update_reservation(reservation_id):
     data = request.get_json()
     conn = get_db()
-    print(f"Updating reservation {reservation_id} with data: {data}")
 
     try:
+        # Hold the write lock from the conflict check through the UPDATE
+        begin_write(conn)
+
         # Get the existing reservation to fill in any missing fields
         existing_reservation = conn.execute(
             'SELECT * FROM reservations WHERE id = ?',
             (reservation_id,)).fetchone()
 
         if not existing_reservation:
+            conn.rollback()
             return jsonify({'error': 'Reservation not found'}), 404
 
         # Extract time and room data for conflict checking
         start_time = data.get('start_time', existing_reservation['start_time'])
         end_time = data.get('end_time', existing_reservation['end_time'])
+
+        # Store times zero-padded, with overnight end times as 24+ hours
+        start_minutes, end_minutes = slot_minutes(start_time, end_time)
+        if start_minutes < OPEN_MINUTE or end_minutes > CLOSE_MINUTE:
+            conn.rollback()
+            return jsonify({
+                'error': 'Invalid reservation time. Please ensure your reservation is within business hours (11 AM - 1 AM).',
+                'fields': ['start_time', 'end_time']
+            }), 400
+        start_time = minutes_to_time(start_minutes)
+        end_time = minutes_to_time(end_minutes)
         room_id = data.get('room_id', existing_reservation['room_id'])
         date = data.get('date', existing_reservation['date'])
 
@@ -705,49 +2498,20 @@ def update_reservation(reservation_id):
             end_time != existing_reservation['end_time'] or
             room_id != existing_reservation['room_id'] or
                 date != existing_reservation['date']):
-
-            # Log the conflict check parameters
-            print(f"Checking conflicts for reservation {reservation_id}:")
-            print(f"  Room: {room_id}, Date: {date}")
-            print(f"  Time: {start_time} - {end_time}")
-
-            # Improved conflict detection query
-            # For debugging, let's print all reservations in this room on this date
-            all_reservations = conn.execute('''
-                SELECT id, start_time, end_time FROM reservations
-                WHERE room_id = ? AND date = ?
-            ''', (room_id, date)).fetchall()
-
-            print(f"All reservations in room {room_id} on {date}:")
-            for res in all_reservations:
-                print(
-                    f"  ID: {res['id']}, Time: {res['start_time']} - {res['end_time']}")
-
-            # Now check for conflicts
-            conflict = conn.execute('''
-                SELECT * FROM reservations
-                WHERE room_id = ? AND date = ? AND id != ? AND
-                NOT (end_time <= ? OR start_time >= ?)
-            ''', (room_id, date, reservation_id,
-                  start_time, end_time)).fetchone()
-
-            # Log the conflict check for debugging
-            if conflict:
-                print(
-                    f"Conflict detected for reservation {reservation_id}: {conflict['id']} ({conflict['start_time']} - {conflict['end_time']})")
-                print(f"Attempted time: {start_time} - {end_time}")
-
-            if conflict:
+            if find_conflicts(conn, room_id, date, start_time, end_time,
+                              exclude_id=reservation_id):
+                conn.rollback()
                 return jsonify({
                     'error': 'The selected time slot is already occupied by another reservation',
                     'conflict': True
                 }), 409
 
-        # Calculate new cost if time or room has changed
+        # Calculate new cost if time, room or date has changed
         if (start_time != existing_reservation['start_time'] or
             end_time != existing_reservation['end_time'] or
-                room_id != existing_reservation['room_id']):
-            total_cost = calculate_cost(start_time, end_time, room_id)
+            room_id != existing_reservation['room_id'] or
+                date != existing_reservation['date']):
+            total_cost = calculate_cost(start_time, end_time, room_id, date)
         else:
             total_cost = existing_reservation['total_cost']
 
@@ -767,15 +2531,21 @@ def update_reservation(reservation_id):
         conn.execute('''
             UPDATE reservations
             SET room_id = ?, date = ?, start_time = ?, end_time = ?,
+                start_min = ?, end_min = ?,
                 contact_name = ?, contact_phone = ?, contact_email = ?,
                 num_people = ?, language = ?, notes = ?, status = ?, total_cost = ?
             WHERE id = ?
-        ''', (room_id, date, start_time, end_time,
+        ''', (room_id, date, start_time, end_time, start_minutes, end_minutes,
               contact_name, contact_phone, contact_email,
               num_people, language, notes, status, total_cost,
               reservation_id))
 
+        refresh_daily_stats(conn, existing_reservation['date'], date)
+        bump_data_versions(conn, existing_reservation['date'], date)
         conn.commit()
+        invalidate_dates(existing_reservation['date'], date)
+        publish_reservation_change(conn, 'updated', reservation_id,
+                                   existing_reservation['date'])
         return jsonify({
             'success': True,
             'message': 'Reservation updated successfully',
@@ -798,8 +2568,6 @@ def update_reservation(reservation_id):
     except Exception as e:
         conn.rollback()
         return jsonify({'error': str(e)}), 500
-    finally:
-        conn.close()
 
 
 @app.route('/move_to_idle/<int:reservation_id>', methods=['POST'])
@@ -823,46 +2591,72 @@ def move_to_idle(reservation_id):
         if existing:
             return jsonify({'message': 'Reservation already in idle area'}), 200
 
-        # Add to idle_reservations
+        # Add to idle_reservations and flag the reservation so conflict
+        # checks skip it
         conn.execute('''
             INSERT INTO idle_reservations (reservation_id, date)
             VALUES (?, ?)
         ''', (reservation_id, reservation['date']))
+        conn.execute('UPDATE reservations SET is_idle = 1 WHERE id = ?',
+                     (reservation_id,))
 
+        refresh_daily_stats(conn, reservation['date'])
+        bump_data_versions(conn, reservation['date'])
         conn.commit()
+        invalidate_dates(reservation['date'])
+        publish_reservation_change(conn, 'idled', reservation_id)
         return jsonify({'success': True}), 200
     except Exception as e:
         conn.rollback()
         return jsonify({'error': str(e)}), 500
-    finally:
-        conn.close()
 
 
 @app.route('/remove_from_idle/<int:reservation_id>', methods=['POST'])
 def remove_from_idle(reservation_id):
-    """Remove a reservation from the idle area."""
+    """
+    Put an idle reservation back in its room at its own time. Dropping it
+    somewhere else goes through /move_reservation, which leaves the idle
+    area in the same transaction.
+    """
     conn = get_db()
     try:
+        # Hold the write lock from the conflict check through the UPDATE
+        begin_write(conn)
+
         # Check if the reservation exists in idle area
         existing = conn.execute(
             'SELECT * FROM idle_reservations WHERE reservation_id = ?',
             (reservation_id,)).fetchone()
 
         if not existing:
+            conn.rollback()
             return jsonify({'error': 'Reservation not found in idle area'}), 404
 
-        # Remove from idle_reservations
+        # Its slot may have been booked while it was parked
+        reservation = fetch_reservations(
+            conn, 'SELECT * FROM reservations WHERE id = ?', (reservation_id,))[0]
+        if find_conflicts(conn, reservation.room_id, reservation.date,
+                          reservation.start_time, reservation.end_time,
+                          exclude_id=reservation_id):
+            conn.rollback()
+            return jsonify({'error': 'The selected time slot is already occupied', 'conflict': True}), 409
+
+        # Remove from idle_reservations and clear the idle flag
         conn.execute(
             'DELETE FROM idle_reservations WHERE reservation_id = ?',
             (reservation_id,))
+        conn.execute('UPDATE reservations SET is_idle = 0 WHERE id = ?',
+                     (reservation_id,))
 
+        refresh_daily_stats(conn, existing['date'])
+        bump_data_versions(conn, existing['date'])
         conn.commit()
+        invalidate_dates(existing['date'])
+        publish_reservation_change(conn, 'restored', reservation_id)
         return jsonify({'success': True}), 200
     except Exception as e:
         conn.rollback()
         return jsonify({'error': str(e)}), 500
-    finally:
-        conn.close()
 
 
 @app.route('/move_reservation', methods=['POST'])
@@ -883,60 +2677,56 @@ def move_reservation():
 
         conn = get_db()
         try:
+            # Hold the write lock from the conflict check through the UPDATE
+            begin_write(conn)
+
             # Get existing reservation
-            reservation = conn.execute(
-                'SELECT * FROM reservations WHERE id = ?', (reservation_id,)).fetchone()
-            if not reservation:
+            rows = fetch_reservations(
+                conn, 'SELECT * FROM reservations WHERE id = ?', (reservation_id,))
+            if not rows:
+                conn.rollback()
                 return jsonify({'error': 'Reservation not found'}), 404
-
-            # Parse old times to preserve duration
-            old_start_dt, _ = parse_time_safe(reservation['start_time'])
-            old_end_dt, old_is_extended = parse_time_safe(
-                reservation['end_time'])
-
-            # Compute old duration in minutes
-            if old_is_extended or old_end_dt <= old_start_dt:
-                old_end_dt = old_end_dt.replace(day=old_start_dt.day + 1)
-            duration_minutes = int(
-                (old_end_dt - old_start_dt).total_seconds() / 60)
+            reservation = rows[0]
 
             # Parse new start_time provided (HH:MM)
             try:
-                new_start_dt = datetime.strptime(start_time_str, '%H:%M')
+                new_start_minutes = time_to_minutes(start_time_str)
             except ValueError:
+                conn.rollback()
                 return jsonify({'error': 'Invalid start_time format. Use HH:MM.'}), 400
 
-            # Determine new end time by adding duration
-            new_end_dt = new_start_dt + timedelta(minutes=duration_minutes)
-
-            # If new_end_dt crosses midnight, represent end_time in 24+ hour format (e.g., 25:00)
-            # Compare day values
-            if new_end_dt.day != new_start_dt.day:
-                # compute hour beyond 24
-                end_hour = new_end_dt.hour + 24
-                new_end_time_str = f"{end_hour:02d}:{new_end_dt.minute:02d}"
-            else:
-                new_end_time_str = new_end_dt.strftime('%H:%M')
-
-            new_start_time_str = new_start_dt.strftime('%H:%M')
-
-            # Conflict check: ensure no overlapping non-idle reservations
-            conflict = conn.execute('''
-                SELECT * FROM reservations
-                WHERE room_id = ? AND date = ? AND id != ? AND
-                NOT (end_time <= ? OR start_time >= ?)
-            ''', (room_id, date, reservation_id, new_start_time_str, new_end_time_str)).fetchone()
+            # Keep the old duration; an end past midnight stays in 24+ hour
+            # format (e.g. 25:00)
+            new_end_minutes = new_start_minutes + reservation.duration_minutes
+            if new_start_minutes < OPEN_MINUTE or new_end_minutes > CLOSE_MINUTE:
+                conn.rollback()
+                return jsonify({'error': 'Invalid reservation time. Please ensure your reservation is within business hours (11 AM - 1 AM).'}), 400
+            new_start_time_str = minutes_to_time(new_start_minutes)
+            new_end_time_str = minutes_to_time(new_end_minutes)
 
-            if conflict:
+            # Conflict check: ensure no overlapping reservations
+            if find_conflicts(conn, room_id, date, new_start_time_str,
+                              new_end_time_str, exclude_id=reservation_id):
+                conn.rollback()
                 return jsonify({'error': 'The selected time slot is already occupied', 'conflict': True}), 409
 
-            # Update reservation
+            # Update reservation; dropping an idle one into a room takes
+            # it out of the idle area in the same transaction
             conn.execute('''
                 UPDATE reservations
-                SET room_id = ?, start_time = ?, end_time = ?, date = ?
+                SET room_id = ?, start_time = ?, end_time = ?,
+                    start_min = ?, end_min = ?, date = ?, is_idle = 0
                 WHERE id = ?
-            ''', (room_id, new_start_time_str, new_end_time_str, date, reservation_id))
+            ''', (room_id, new_start_time_str, new_end_time_str, new_start_minutes,
+                  new_end_minutes, date, reservation_id))
+            conn.execute('DELETE FROM idle_reservations WHERE reservation_id = ?',
+                         (reservation_id,))
+            refresh_daily_stats(conn, reservation.date, date)
+            bump_data_versions(conn, reservation.date, date)
             conn.commit()
+            invalidate_dates(reservation.date, date)
+            publish_reservation_change(conn, 'moved', reservation_id,
+                                       reservation.date)
 
             return jsonify({'message': 'Reservation moved successfully', 'reservation': {
                 'id': reservation_id,
@@ -949,48 +2739,74 @@ def move_reservation():
         except Exception as e:
             conn.rollback()
             return jsonify({'error': str(e)}), 500
-        finally:
-            conn.close()
     except Exception as e:
         return jsonify({'error': str(e)}), 400
 
 
 @app.route('/today_stats')
 def today_stats():
-    conn = get_db()
-    today = datetime.now().strftime('%Y-%m-%d')
-
-    # Get total reservations for today
-    total_reservations = conn.execute('''
-        SELECT COUNT(*) as count
-        FROM reservations
-        WHERE date = ?
-    ''', (today,)).fetchone()['count']
-
-    # Calculate occupancy rate
-    total_rooms = conn.execute(
-        'SELECT COUNT(*) as count FROM rooms').fetchone()['count']
-    total_hours = 14  # 11 AM to 1 AM = 14 hours
-    total_room_hours = total_rooms * total_hours
-
-    occupied_hours = conn.execute('''
-        SELECT SUM(
-            CAST(
-                (julianday(end_time) - julianday(start_time)) * 24
-                AS INTEGER)
-        ) as hours
-        FROM reservations
-        WHERE date = ?
-    ''', (today,)).fetchone()['hours'] or 0
-
-    occupancy_rate = round((occupied_hours / total_room_hours) * 100, 1)
-
-    conn.close()
-
-    return jsonify({
-        'total_reservations': total_reservations,
-        'occupancy_rate': occupancy_rate
-    })
+    return jsonify(get_today_stats())
+
+
+def prometheus_labels(**labels):
+    """Format labels as a Prometheus {name="value",...} block."""
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+               for value in labels.values())
+    return '{' + ','.join(f'{name}="{value}"'
+                          for name, value in zip(labels, escaped)) + '}'
+
+
+def render_histogram(lines, name, histogram, **labels):
+    """Append a histogram's cumulative _bucket, _sum and _count lines."""
+    cumulative = 0
+    for bound, count in zip(histogram.buckets + ('+Inf',), histogram.counts):
+        cumulative += count
+        lines.append(f'{name}_bucket{prometheus_labels(**labels, le=bound)} {cumulative}')
+    lines.append(f'{name}_sum{prometheus_labels(**labels)} {histogram.sum}')
+    lines.append(f'{name}_count{prometheus_labels(**labels)} {histogram.count}')
+
+
+@app.route('/metrics')
+def metrics():
+    """Request and SQL metrics in the Prometheus text format."""
+    lines = []
+    with _metrics_lock:
+        routes = sorted(_route_metrics.items())
+
+        lines += ['# HELP karaoke_request_duration_seconds Request latency by route.',
+                  '# TYPE karaoke_request_duration_seconds histogram']
+        for (method, route), route_metrics in routes:
+            render_histogram(lines, 'karaoke_request_duration_seconds',
+                             route_metrics.latency, method=method, route=route)
+
+        lines += ['# HELP karaoke_request_sql_queries SQL statements run per request.',
+                  '# TYPE karaoke_request_sql_queries histogram']
+        for (method, route), route_metrics in routes:
+            render_histogram(lines, 'karaoke_request_sql_queries',
+                             route_metrics.queries, method=method, route=route)
+
+        lines += ['# HELP karaoke_request_sql_seconds_total Time spent executing SQL statements.',
+                  '# TYPE karaoke_request_sql_seconds_total counter']
+        for (method, route), route_metrics in routes:
+            lines.append('karaoke_request_sql_seconds_total'
+                         f'{prometheus_labels(method=method, route=route)} '
+                         f'{route_metrics.sql_seconds}')
+
+        lines += ['# HELP karaoke_requests_total Requests by route and status.',
+                  '# TYPE karaoke_requests_total counter']
+        for (method, route), route_metrics in routes:
+            for status, count in sorted(route_metrics.statuses.items()):
+                lines.append('karaoke_requests_total'
+                             f'{prometheus_labels(method=method, route=route, status=status)} '
+                             f'{count}')
+
+        lines += [f'# HELP karaoke_slow_queries_total Statements slower than '
+                  f'{SLOW_QUERY_SECONDS} seconds.',
+                  '# TYPE karaoke_slow_queries_total counter',
+                  f'karaoke_slow_queries_total {_slow_query_count}']
+
+    return app.response_class('\n'.join(lines) + '\n',
+                              content_type='text/plain; version=0.0.4; charset=utf-8')
 
 
 @app.route('/api/room_availability')
@@ -1005,29 +2821,27 @@ def check_room_availability():
         return jsonify({'error': 'Invalid date format'}), 400
 
     conn = get_db()
-    try:
-        # Get all rooms
-        rooms = conn.execute('SELECT id FROM rooms').fetchall()
-        room_ids = [room['id'] for room in rooms]
 
-        # Get booked rooms for the date
-        booked_rooms = conn.execute('''
-            SELECT DISTINCT room_id
-            FROM reservations
-            WHERE date = ?
-        ''', (date,)).fetchall()
-        booked_room_ids = [room['room_id'] for room in booked_rooms]
+    # Get all rooms
+    rooms = conn.execute('SELECT id FROM rooms').fetchall()
+    room_ids = [room['id'] for room in rooms]
 
-        # Available rooms are those not in booked_room_ids
-        available_rooms = list(set(room_ids) - set(booked_room_ids))
+    # Get booked rooms for the date
+    booked_rooms = conn.execute('''
+        SELECT DISTINCT room_id
+        FROM reservations
+        WHERE date = ?
+    ''', (date,)).fetchall()
+    booked_room_ids = [room['room_id'] for room in booked_rooms]
 
-        return jsonify({
-            'available_rooms': available_rooms,
-            'total_rooms': len(room_ids),
-            'booked_rooms': len(booked_room_ids)
-        })
-    finally:
-        conn.close()
+    # Available rooms are those not in booked_room_ids
+    available_rooms = list(set(room_ids) - set(booked_room_ids))
+
+    return jsonify({
+        'available_rooms': available_rooms,
+        'total_rooms': len(room_ids),
+        'booked_rooms': len(booked_room_ids)
+    })
 
 
 @app.route('/api/calendar_availability')
@@ -1045,35 +2859,50 @@ def calendar_availability():
     except ValueError:
         return jsonify({'error': 'Invalid date format'}), 400
 
-    conn = get_db()
+    return jsonify(build_calendar_availability(
+        get_db(), start_date_obj, end_date_obj))
 
-    # Get total number of rooms
-    total_rooms = conn.execute(
-        'SELECT COUNT(*) as count FROM rooms WHERE id > 0').fetchone()['count']
 
-    # Calculate date range
-    date_range = []
-    current_date = start_date_obj
-    while current_date <= end_date_obj:
-        date_range.append(current_date.strftime('%Y-%m-%d'))
-        current_date += timedelta(days=1)
+def build_calendar_availability(conn, start_date_obj, end_date_obj):
+    """Return per-day availability for every date in the inclusive range."""
+    # Get total number of rooms
+    total_rooms = len(get_bookable_rooms(conn))
+
+    # Aggregate the whole range from the daily_stats rollup; idle
+    # reservations are counted but don't occupy a room. Per date:
+    # [reservation count, booked room ids, booked minutes]
+    start_date = start_date_obj.isoformat()
+    end_date = end_date_obj.isoformat()
+    daily_totals = {}
+    for row in conn.execute('''
+        SELECT date, room_id, reservation_count, active_count, booked_minutes
+        FROM daily_stats
+        WHERE date BETWEEN ? AND ?
+    ''', (start_date, end_date)):
+        totals = daily_totals.setdefault(row['date'], [0, set(), 0])
+        totals[0] += row['reservation_count']
+        if row['active_count']:
+            totals[1].add(row['room_id'])
+        totals[2] += row['booked_minutes']
+
+    # Recurring series occurrences aren't in the rollup
+    for occurrence in expand_recurring(conn, start_date, end_date):
+        totals = daily_totals.setdefault(occurrence.date, [0, set(), 0])
+        totals[0] += 1
+        totals[1].add(occurrence.room_id)
+        totals[2] += occurrence.duration_minutes
 
     result = []
 
-    for date in date_range:
-        # Get reservation count for this date
-        reservation_count = conn.execute('''
-            SELECT COUNT(*) as count
-            FROM reservations
-            WHERE date = ? AND status != 'cancelled'
-        ''', (date,)).fetchone()['count']
+    # Fill in every day of the range, including days with no bookings
+    current_date = start_date_obj
+    while current_date <= end_date_obj:
+        date = current_date.strftime('%Y-%m-%d')
+        totals = daily_totals.get(date)
 
-        # Get unique booked rooms for this date
-        booked_rooms = conn.execute('''
-            SELECT COUNT(DISTINCT room_id) as count
-            FROM reservations
-            WHERE date = ? AND status != 'cancelled'
-        ''', (date,)).fetchone()['count']
+        reservation_count = totals[0] if totals else 0
+        booked_rooms = len(totals[1]) if totals else 0
+        booked_minutes = totals[2] if totals else 0
 
         # Calculate available rooms
         available_rooms = total_rooms - booked_rooms
@@ -1087,178 +2916,400 @@ def calendar_availability():
             'date': date,
             'reservationCount': reservation_count,
             'availableRooms': available_rooms,
+            'bookedRooms': booked_rooms,
+            'bookedHours': round(booked_minutes / 60, 2),
             'totalRooms': total_rooms,
             'occupancyPercentage': round(occupancy_percentage, 1)
         })
 
-    return jsonify(result)
+        current_date += timedelta(days=1)
+
+    return result
+
+
+@app.route('/api/analytics')
+def analytics():
+    """
+    Revenue, room-hours and occupancy for a date range, broken down by day,
+    ISO week, hour of day, room, pricing tier and status.
+
+    Query parameters: start and end (YYYY-MM-DD, inclusive) and optional
+    group_by (comma-separated ANALYTICS_GROUPS, default all).
+    """
+    start_date = request.args.get('start')
+    end_date = request.args.get('end')
+    if not start_date or not end_date:
+        return jsonify({'error': 'Start and end date parameters are required'}), 400
+
+    try:
+        start_date_obj = datetime.strptime(start_date, '%Y-%m-%d').date()
+        end_date_obj = datetime.strptime(end_date, '%Y-%m-%d').date()
+    except ValueError:
+        return jsonify({'error': 'Invalid date format'}), 400
+
+    if end_date_obj < start_date_obj:
+        return jsonify({'error': 'End date must not be before start date'}), 400
+    if (end_date_obj - start_date_obj).days >= MAX_ANALYTICS_DAYS:
+        return jsonify({'error': f'Date range is limited to {MAX_ANALYTICS_DAYS} days'}), 400
+
+    groups = ANALYTICS_GROUPS
+    if request.args.get('group_by'):
+        groups = request.args['group_by'].split(',')
+        unknown = [group for group in groups if group not in ANALYTICS_GROUPS]
+        if unknown:
+            return jsonify({'error': f"Unknown group_by: {', '.join(unknown)}"}), 400
+
+    return jsonify(build_analytics(get_db(), start_date_obj, end_date_obj, groups))
+
+
+def build_analytics(conn, start_date_obj, end_date_obj, groups=ANALYTICS_GROUPS):
+    """
+    Aggregate hourly_stats (plus recurring series occurrences, which are
+    never stored) over a date range.
+
+    Cancelled reservations only show up in the status breakdown; every
+    other figure counts what was actually booked. Occupancy is booked
+    room-minutes over the bookable room-minutes of the same slice.
+    """
+    start_date = start_date_obj.strftime('%Y-%m-%d')
+    end_date = end_date_obj.strftime('%Y-%m-%d')
+    rooms = get_bookable_rooms(conn)
+    room_names = {room['id']: room['name'] for room in rooms}
+
+    rows = [tuple(row) for row in conn.execute('''
+        SELECT date, room_id, status, hour, tier, reservation_count,
+               booked_minutes, revenue
+        FROM hourly_stats
+        WHERE date BETWEEN ? AND ?
+    ''', (start_date, end_date))]
+    rows += hourly_stats_rows(conn, expand_recurring(conn, start_date, end_date))
+
+    # group -> key -> [reservations, booked minutes, revenue, capacity minutes]
+    buckets = {group: {} for group in groups}
+
+    def add(group, key, count=0, minutes=0, revenue=0.0, capacity=0):
+        if group in buckets:
+            totals = buckets[group].setdefault(key, [0, 0, 0.0, 0])
+            totals[0] += count
+            totals[1] += minutes
+            totals[2] += revenue
+            totals[3] += capacity
+
+    # Bookable capacity of every slice, day by day
+    weeks = {}
+    current_date = start_date_obj
+    while current_date <= end_date_obj:
+        date = current_date.strftime('%Y-%m-%d')
+        iso_year, iso_week, _ = current_date.isocalendar()
+        weeks[date] = f'{iso_year}-W{iso_week:02d}'
+        day_minutes = CLOSE_MINUTE - OPEN_MINUTE
+
+        add('day', date, capacity=len(rooms) * day_minutes)
+        add('week', weeks[date], capacity=len(rooms) * day_minutes)
+        for hour in range(OPEN_HOUR, 24 + CLOSE_HOUR):
+            add('hour', hour % 24, capacity=len(rooms) * 60)
+        for room in rooms:
+            add('room', room['id'], capacity=day_minutes)
+        tier_table = PRICING_TIERS[pricing_day_type(date)]
+        for label, tier_start, tier_end, _ in tier_table:
+            add('tier', label, capacity=len(rooms) * (tier_end - tier_start))
+        current_date += timedelta(days=1)
+
+    totals = [0, 0, 0.0]
+    for date, room_id, status, hour, tier, count, minutes, revenue in rows:
+        if date not in weeks:
+            continue
+        add('status', status, count, minutes, revenue)
+        if status == 'cancelled' or room_id not in room_names:
+            continue
+
+        totals[0] += count
+        totals[1] += minutes
+        totals[2] += revenue
+        add('day', date, count, minutes, revenue)
+        add('week', weeks[date], count, minutes, revenue)
+        add('hour', hour % 24, count, minutes, revenue)
+        add('room', room_id, count, minutes, revenue)
+        add('tier', tier, count, minutes, revenue)
+
+    def summary(count, minutes, revenue, capacity=None):
+        return {
+            'reservations': count,
+            'revenue': round(revenue, 2),
+            'room_hours': round(minutes / 60, 2),
+            'occupancy': round(minutes / capacity * 100, 1) if capacity else None
+        }
+
+    capacity_minutes = len(rooms) * (CLOSE_MINUTE - OPEN_MINUTE) * len(weeks)
+    result = {
+        'start': start_date,
+        'end': end_date,
+        'totals': summary(*totals, capacity_minutes)
+    }
+    labels = {'day': 'date', 'week': 'week', 'hour': 'hour', 'room': 'room_id',
+              'tier': 'tier', 'status': 'status'}
+    for group in groups:
+        breakdown = []
+        # Hours after midnight sort after the evening, as on the timeline
+        order = ((lambda item: (item[0] < OPEN_HOUR, item[0])) if group == 'hour'
+                 else (lambda item: item[0]))
+        for key, (count, minutes, revenue, capacity) in sorted(buckets[group].items(),
+                                                               key=order):
+            entry = {labels[group]: key}
+            if group == 'room':
+                entry['name'] = room_names.get(key)
+            entry.update(summary(count, minutes, revenue,
+                                 None if group == 'status' else capacity))
+            breakdown.append(entry)
+        result[f'by_{group}'] = breakdown
+    return result
 
 
 @app.route('/api/price_estimate', methods=['POST'])
 def price_estimate():
     data = request.get_json()
-    print("Received price estimate request:", data)  # Debug log
 
     try:
-        # Parse the times using our safe parser
-        start_time, _ = parse_time_safe(data['start_time'])
-        end_time, is_extended = parse_time_safe(data['end_time'])
-
-        # Initialize cost components
-        room_rate = 0
-        period_charges = []
-
-        # Calculate time period charges
-        current_time = start_time
-        end_datetime = end_time
-
-        # Handle overnight reservations
-        if is_extended or end_datetime <= current_time or end_time.hour == 0:
-            end_datetime += timedelta(days=1)
-
-        while current_time < end_datetime:
-            hour = current_time.hour
-            if 11 <= hour < 18:  # 11 AM - 6 PM
-                rate = 35
-                period = "Early Bird (11 AM - 6 PM)"
-            elif 18 <= hour < 21:  # 6 PM - 9 PM
-                rate = 45
-                period = "Prime Time (6 PM - 9 PM)"
-            else:  # 9 PM - 1 AM
-                rate = 50
-                period = "Late Night (9 PM - 1 AM)"
-
-            # Calculate duration for this rate period
-            next_hour = (current_time + timedelta(hours=1)).replace(minute=0)
-            if hour >= 21:  # Late night period
-                # For late night, ensure we go up to 1 AM (next day)
-                next_hour = min(next_hour, (current_time +
-                                timedelta(days=1)).replace(hour=1, minute=0))
-            # Special handling for midnight (0:00)
-            elif hour == 0:  # Midnight
-                # Treat midnight as part of the late night period
-                next_hour = min(
-                    next_hour, (current_time).replace(hour=1, minute=0))
-
-            period_end = min(next_hour, end_datetime)
-            duration = (period_end - current_time).total_seconds() / 3600
-
-            period_cost = rate * duration
-            room_rate += period_cost
+        return jsonify(estimate_price(get_db(), data))
+    except Exception as e:
+        return jsonify({'error': str(e)}), 400
 
-            period_charges.append({
-                'time': period,
-                'rate': rate,
-                'duration': round(duration, 2),
-                'cost': round(period_cost, 2)
-            })
 
-            current_time = period_end
+def estimate_price(conn, data):
+    """Quote a price estimate request (start_time, end_time, room_id, date)."""
+    # Quote for the first bookable room when the form has no room yet
+    room_id = data.get('room_id')
+    if not room_id:
+        room_id = get_bookable_rooms(conn)[0]['id']
 
-        # Calculate tax and total
-        subtotal = room_rate
-        tax = subtotal * TAX_RATE
-        total = subtotal + tax
+    return quote_price(conn, room_id, data['start_time'],
+                       data['end_time'], data.get('date'))
 
-        response_data = {
-            'room_rate': round(room_rate, 2),
-            'period_charges': period_charges,
-            'tax': round(tax, 2),
-            'total': round(total, 2)
-        }
-        print("Price estimate response:", response_data)  # Debug log
-        return jsonify(response_data)
+
+@app.route('/api/price_quotes', methods=['POST'])
+def price_quotes():
+    """Price every room x start time x duration combination in one call."""
+    data = request.get_json()
+    if not data:
+        return jsonify({'error': 'No data provided'}), 400
+
+    try:
+        date = data['date']
+        room_ids = [int(room_id) for room_id in data['room_ids']]
+        start_times = data['start_times']
+        durations = data['durations']  # in hours, e.g. [1, 1.5, 2]
+
+        starts = [time_to_minutes(start_time) for start_time in start_times]
+        lengths = [round(float(duration) * 60) for duration in durations]
+    except (KeyError, TypeError, ValueError):
+        return jsonify({
+            'error': 'date, room_ids, start_times and durations are required',
+            'fields': ['date', 'room_ids', 'start_times', 'durations']
+        }), 400
+
+    if any(length <= 0 for length in lengths):
+        return jsonify({'error': 'Durations must be positive',
+                        'fields': ['durations']}), 400
+    # The latest start with the longest duration is the last quote to end
+    if starts and lengths and (min(starts) < OPEN_MINUTE or
+                               max(starts) + max(lengths) > CLOSE_MINUTE):
+        return jsonify({
+            'error': 'Every quote must be within business hours (11 AM - 1 AM)',
+            'fields': ['start_times', 'durations']
+        }), 400
+    if len(room_ids) * len(starts) * len(lengths) > MAX_PRICE_QUOTES:
+        return jsonify({
+            'error': f'At most {MAX_PRICE_QUOTES} quotes per request'
+        }), 400
+
+    try:
+        conn = get_db()
+        rooms = get_room_catalog(conn)
+        if any(room_id <= 0 or room_id not in rooms for room_id in room_ids):
+            return jsonify({'error': 'Unknown room', 'fields': ['room_ids']}), 400
+
+        day_type = pricing_day_type(date)
+        quotes = []
+
+        # Each cell is two lookups into the room's rate prefix sums
+        for room_id in room_ids:
+            _, prefix = get_rate_schedule(conn, room_id, day_type)
+            for start, start_time in zip(starts, start_times):
+                for length, duration in zip(lengths, durations):
+                    end = start + length
+                    room_rate = (prefix[end] - prefix[start]) / 60
+                    tax = room_rate * TAX_RATE
+                    quotes.append({
+                        'room_id': room_id,
+                        'start_time': minutes_to_time(start),
+                        'end_time': minutes_to_time(end),
+                        'duration': duration,
+                        'room_rate': round(room_rate, 2),
+                        'tax': round(tax, 2),
+                        'total': round(room_rate + tax, 2)
+                    })
+
+        return jsonify({'date': date, 'quotes': quotes})
     except Exception as e:
-        print("Price estimate error:", str(e))  # Debug log
         return jsonify({'error': str(e)}), 400
 
 
 @app.route('/api/room_suggestion', methods=['POST'])
 def room_suggestion():
+    """
+    Suggest rooms that fit the party, best fit first.
+    When date, start_time and end_time are given, rooms free for that
+    window are ranked ahead of booked ones.
+    """
     data = request.get_json()
     try:
         num_people = int(data['num_people'])
+        date = data.get('date')
+        start_time = data.get('start_time')
+        end_time = data.get('end_time')
+        check_availability = bool(date and start_time and end_time)
 
         conn = get_db()
-        rooms = conn.execute('SELECT * FROM rooms').fetchall()
+        rooms = []
+        for room in get_bookable_rooms(conn):
+            if room['capacity'] < num_people:
+                continue
+
+            available = None
+            if check_availability:
+                available = not find_conflicts(
+                    conn, room['id'], date, start_time, end_time)
 
-        # Define room capacity ranges
-        small_rooms = [room for room in rooms if room['capacity'] <= 4]
-        medium_rooms = [room for room in rooms if 4 < room['capacity'] <= 8]
-        large_rooms = [room for room in rooms if room['capacity'] > 8]
+            rooms.append({
+                'id': room['id'],
+                'name': room['name'],
+                'capacity': room['capacity'],
+                'available': available
+            })
 
-        suggested_rooms = []
-        reason = ""
+        # Free rooms first, then the smallest room that still fits
+        rooms.sort(key=lambda room: (room['available'] is False,
+                                     room['capacity'] - num_people, room['id']))
 
-        if num_people <= 4:
-            suggested_rooms = [room['id'] for room in small_rooms]
+        if not rooms:
+            reason = f"No room fits a group of {num_people}"
+        elif check_availability and rooms[0]['available'] is False:
+            reason = "All rooms that fit this group are booked at that time"
+        elif num_people <= 4:
             reason = "Perfect for small groups up to 4 people"
         elif num_people <= 8:
-            suggested_rooms = [room['id'] for room in medium_rooms]
             reason = "Ideal for medium-sized groups"
         else:
-            suggested_rooms = [room['id'] for room in large_rooms]
             reason = "Best suited for large groups"
 
         return jsonify({
-            'suggested_rooms': suggested_rooms,
+            'suggested_rooms': [room['id'] for room in rooms],
+            'rooms': rooms,
             'reason': reason
         })
     except Exception as e:
         return jsonify({'error': str(e)}), 400
 
 
+def get_occupancy_bitmaps(conn, date):
+    """
+    Return {room_id: bitmap} of booked SLOT_MINUTES slots for a date.
+
+    Bit i is set when any non-idle reservation overlaps the slot starting
+    at OPEN_MINUTE + i * SLOT_MINUTES. Bitmaps are built once per date and
+    reused until a write bumps the date's version.
+    """
+    version = data_version(conn, date)
+    cached = cached_date(_occupancy_cache, date)
+    if cached is not None and cached[0] == version:
+        return cached[1]
+
+    bitmaps = {room['id']: 0 for room in get_bookable_rooms(conn)}
+
+    for reservation in fetch_reservations(conn, '''
+        SELECT room_id, start_time, end_time, start_min, end_min FROM reservations
+        WHERE date = ? AND is_idle = 0 AND status != 'cancelled'
+    ''', (date,)) + expand_recurring(conn, date, date):
+        first = max((reservation.start_minutes - OPEN_MINUTE) // SLOT_MINUTES, 0)
+        last = min(-(-(reservation.end_minutes - OPEN_MINUTE) // SLOT_MINUTES),
+                   DAY_SLOTS)
+        if last > first:
+            room_id = reservation.room_id
+            bitmaps[room_id] = bitmaps.get(room_id, 0) | (
+                ((1 << (last - first)) - 1) << first)
+
+    cache_date(_occupancy_cache, date, (version, bitmaps), OCCUPANCY_CACHE_SIZE)
+    return bitmaps
+
+
+def find_free_windows(bitmaps, duration_minutes):
+    """Yield (room_id, start minute) for every free window of the duration."""
+    slots = -(-duration_minutes // SLOT_MINUTES)
+    if not 0 < slots <= DAY_SLOTS:
+        return
+
+    all_slots = (1 << DAY_SLOTS) - 1
+    for room_id, booked in bitmaps.items():
+        # Bit i of `starts` survives only if slots i .. i+slots-1 are all free
+        free = ~booked & all_slots
+        starts = free
+        for shift in range(1, slots):
+            starts &= free >> shift
+        starts &= (1 << (DAY_SLOTS - slots + 1)) - 1
+
+        while starts:
+            low_bit = starts & -starts
+            yield room_id, OPEN_MINUTE + (low_bit.bit_length() - 1) * SLOT_MINUTES
+            starts ^= low_bit
+
+
 @app.route('/api/alternative_times', methods=['POST'])
 def alternative_times():
+    """Suggest the free windows nearest to the requested time in any room."""
     data = request.get_json()
     try:
-        date = datetime.strptime(data['date'], '%Y-%m-%d').date()
-        start_time = datetime.strptime(data['start_time'], '%H:%M').time()
-        room_id = int(data['room_id'])
+        return jsonify(suggest_alternative_times(get_db(), data))
+    except Exception as e:
+        return jsonify({'error': str(e)}), 400
 
-        conn = get_db()
 
-        # Get existing reservations for the room on the selected date
-        existing_reservations = conn.execute('''
-            SELECT start_time, end_time
-            FROM reservations
-            WHERE room_id = ? AND date = ?
-            ORDER BY start_time
-        ''', (room_id, date)).fetchall()
-
-        # Generate alternative times
-        alternatives = []
-        current_time = datetime.strptime('11:00', '%H:%M').time()
-        end_time = datetime.strptime('01:00', '%H:%M').time()
-
-        while current_time < end_time:
-            # Skip if this time conflicts with existing reservations
-            is_available = True
-            for reservation in existing_reservations:
-                if (current_time >= reservation['start_time'] and
-                        current_time < reservation['end_time']):
-                    is_available = False
-                    break
+def suggest_alternative_times(conn, data):
+    """Find the free windows nearest to an alternative_times request."""
+    date = datetime.strptime(data['date'], '%Y-%m-%d').strftime('%Y-%m-%d')
+    requested = time_to_minutes(data['start_time'])
+    room_id = data.get('room_id')
+    room_id = int(room_id) if room_id else None
+    limit = int(data.get('limit', 5))
 
-            if is_available and current_time != start_time:
-                alternatives.append(current_time.strftime('%H:%M'))
+    # Duration comes from the requested end time, or is given in hours
+    if data.get('end_time'):
+        _, requested_end = slot_minutes(data['start_time'], data['end_time'])
+        duration_minutes = requested_end - requested
+    else:
+        duration_minutes = round(float(data.get('duration', 2)) * 60)
 
-            # Move to next 30-minute slot
-            current_hour = current_time.hour
-            current_minute = current_time.minute
-            if current_minute == 30:
-                current_hour += 1
-                current_minute = 0
-            else:
-                current_minute = 30
-            current_time = datetime.strptime(
-                f'{current_hour:02d}:{current_minute:02d}', '%H:%M').time()
+    bitmaps = get_occupancy_bitmaps(conn, date)
 
-        return jsonify({
-            'alternatives': alternatives[:5]  # Return top 5 alternatives
-        })
-    except Exception as e:
-        return jsonify({'error': str(e)}), 400
+    # Rank by distance from the requested time, preferring the requested
+    # room on ties. The requested slot itself is not an alternative; the
+    # same time in another room is, unless no room was asked for.
+    candidates = sorted(
+        (abs(start - requested), room != room_id, start, room)
+        for room, start in find_free_windows(bitmaps, duration_minutes)
+        if not (start == requested and room_id in (None, room)))
+
+    return {
+        'alternatives': [{
+            'room_id': room,
+            'start_time': minutes_to_time(start),
+            'end_time': minutes_to_time(start + duration_minutes)
+        } for _, _, start, room in candidates[:limit]]
+    }
+
+
+# Initialize the database once everything init_db() relies on is defined
+with app.app_context():
+    init_db()
 
 
 if __name__ == '__main__':
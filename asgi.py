@@ -0,0 +1,168 @@
+"""
+ASGI entry point for the read and quote endpoints.
+
+/api/daily_reservations, /api/calendar_availability, /api/price_estimate
+and /api/alternative_times are served here without tying up a worker per
+request: requests are parsed on the event loop and the SQLite work runs
+on a small thread pool, using the same functions as the Flask views in
+app.py. Every other path is handed to the Flask app when asgiref is
+installed.
+
+Run with any ASGI server, for example:
+    uvicorn asgi:application
+"""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from urllib.parse import parse_qs
+
+import app as karaoke
+
+try:
+    from asgiref.wsgi import WsgiToAsgi
+except ImportError:
+    WsgiToAsgi = None
+
+# One thread per pooled SQLite connection
+_executor = ThreadPoolExecutor(max_workers=karaoke.DB_POOL_SIZE,
+                               thread_name_prefix='karaoke-db')
+
+# The rest of the Flask app, when asgiref is available
+_flask_app = WsgiToAsgi(karaoke.app) if WsgiToAsgi else None
+
+
+class BadRequest(Exception):
+    """Raised by a handler to answer 400 with the given message."""
+
+
+async def run_db(func, *args):
+    """Run func(conn, *args) on the DB thread pool inside an app context."""
+    def call():
+        with karaoke.app.app_context():
+            return func(karaoke.get_db(), *args)
+
+    return await asyncio.get_running_loop().run_in_executor(_executor, call)
+
+
+def parse_date(value):
+    """Parse a 'YYYY-MM-DD' query parameter or raise BadRequest."""
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').date()
+    except (TypeError, ValueError):
+        raise BadRequest('Invalid date format')
+
+
+async def daily_reservations(request):
+    date = request['query'].get('date')
+    if not date:
+        raise BadRequest('Date parameter is required')
+    parse_date(date)
+
+    etag, body = await run_db(karaoke.get_daily_payload, date)
+    etag = f'"{etag}"'
+    if etag in request['headers'].get('if-none-match', ''):
+        return 304, b'', [(b'etag', etag.encode())]
+    return 200, body.encode('utf-8'), [(b'etag', etag.encode())]
+
+
+async def calendar_availability(request):
+    start_date = request['query'].get('start')
+    end_date = request['query'].get('end')
+    if not start_date or not end_date:
+        raise BadRequest('Start and end date parameters are required')
+
+    return await run_db(karaoke.build_calendar_availability,
+                        parse_date(start_date), parse_date(end_date))
+
+
+async def price_estimate(request):
+    try:
+        return await run_db(karaoke.estimate_price, request['json'])
+    except Exception as e:
+        raise BadRequest(str(e))
+
+
+async def alternative_times(request):
+    try:
+        return await run_db(karaoke.suggest_alternative_times, request['json'])
+    except Exception as e:
+        raise BadRequest(str(e))
+
+
+# (method, path) -> handler
+ROUTES = {
+    ('GET', '/api/daily_reservations'): daily_reservations,
+    ('GET', '/api/calendar_availability'): calendar_availability,
+    ('POST', '/api/price_estimate'): price_estimate,
+    ('POST', '/api/alternative_times'): alternative_times,
+}
+
+
+async def read_body(receive):
+    """Read the complete request body."""
+    body = b''
+    while True:
+        message = await receive()
+        body += message.get('body', b'')
+        if not message.get('more_body'):
+            return body
+
+
+async def send_response(send, status, body, headers=()):
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [(b'content-type', b'application/json'),
+                    (b'content-length', str(len(body)).encode()),
+                    *headers],
+    })
+    await send({'type': 'http.response.body', 'body': body})
+
+
+async def lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            _executor.shutdown(wait=False)
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+
+async def application(scope, receive, send):
+    if scope['type'] == 'lifespan':
+        return await lifespan(receive, send)
+
+    handler = ROUTES.get((scope.get('method'), scope.get('path')))
+    if handler is None:
+        if _flask_app is not None:
+            return await _flask_app(scope, receive, send)
+        body = karaoke.app.json.dumps({'error': 'Not found'}).encode('utf-8')
+        return await send_response(send, 404, body)
+
+    query = parse_qs(scope.get('query_string', b'').decode('latin-1'))
+    request = {
+        'query': {key: values[0] for key, values in query.items()},
+        'headers': {key.decode('latin-1').lower(): value.decode('latin-1')
+                    for key, value in scope.get('headers', [])},
+        'json': None,
+    }
+
+    try:
+        if scope['method'] == 'POST':
+            try:
+                request['json'] = karaoke.app.json.loads(await read_body(receive))
+            except ValueError:
+                raise BadRequest('Invalid JSON body')
+        result = await handler(request)
+    except BadRequest as e:
+        body = karaoke.app.json.dumps({'error': str(e)}).encode('utf-8')
+        return await send_response(send, 400, body)
+
+    if isinstance(result, tuple):
+        status, body, headers = result
+        return await send_response(send, status, body, headers)
+
+    body = karaoke.app.json.dumps(result).encode('utf-8')
+    await send_response(send, 200, body)
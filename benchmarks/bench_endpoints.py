@@ -0,0 +1,237 @@
+"""
+End-to-end endpoint benchmark on a synthetic venue.
+
+Generates a seeded venue database (see venue_data.py) in a temporary
+directory, or copies an existing one with --db, then drives the Flask test
+client through the read and write hot paths:
+
+    GET  /api/daily_reservations
+    GET  /api/calendar_availability
+    POST /reservation
+    POST /move_reservation
+    POST /api/price_estimate
+
+Request parameters come from the same seed, so two runs on the same code
+make the same requests. Prints p50/p99 latency and SQL statements per
+request for each endpoint as JSON, for keeping alongside earlier runs.
+
+Usage:
+    python benchmarks/bench_endpoints.py [--rooms 8] [--years 2] [--seed 42]
+        [--requests 300] [--db karaoke.db] [--output results.json]
+"""
+import argparse
+import json
+import math
+import os
+import platform
+import random
+import shutil
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from venue_data import DAYS_AHEAD, OPEN_MINUTE, generate_venue  # noqa: E402
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a non-empty list."""
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(pct / 100 * len(ordered)) - 1)]
+
+
+def summarize(samples):
+    latencies = [latency for latency, _, _ in samples]
+    queries = [count for _, count, _ in samples]
+    statuses = {}
+    for _, _, status in samples:
+        statuses[str(status)] = statuses.get(str(status), 0) + 1
+    return {
+        'requests': len(samples),
+        'p50_ms': round(percentile(latencies, 50) * 1000, 3),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 3),
+        'mean_ms': round(sum(latencies) / len(latencies) * 1000, 3),
+        'queries_p50': percentile(queries, 50),
+        'queries_p99': percentile(queries, 99),
+        'queries_mean': round(sum(queries) / len(queries), 2),
+        'statuses': statuses,
+    }
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().split('\n')[0])
+    parser.add_argument('--rooms', type=int, default=8)
+    parser.add_argument('--years', type=int, default=2)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--requests', type=int, default=300,
+                        help='measured requests per endpoint')
+    parser.add_argument('--warmup', type=int, default=20,
+                        help='unmeasured requests per endpoint first')
+    parser.add_argument('--db', help='benchmark a copy of this database '
+                                     'instead of generating one')
+    parser.add_argument('--output', help='also write the JSON report here')
+    args = parser.parse_args()
+    output_path = os.path.abspath(args.output) if args.output else None
+
+    # app.py opens karaoke.db relative to cwd, so work in a throwaway dir
+    workdir = tempfile.mkdtemp(prefix='karaoke-bench-')
+    db_path = os.path.join(workdir, 'karaoke.db')
+    today = date.today()
+    started = time.perf_counter()
+    if args.db:
+        shutil.copy(args.db, db_path)
+    else:
+        generate_venue(db_path, args.rooms, args.years, args.seed, today)
+    os.chdir(workdir)
+
+    import app as karaoke
+    from flask import g, request_finished
+    setup_seconds = time.perf_counter() - started
+
+    conn = sqlite3.connect(db_path)
+    room_ids = [row[0] for row in conn.execute('SELECT id FROM rooms WHERE id > 0')]
+    reservation_count = conn.execute('SELECT COUNT(*) FROM reservations').fetchone()[0]
+    first_day, last_day = (datetime.strptime(value, '%Y-%m-%d').date() for value in
+                           conn.execute('SELECT MIN(date), MAX(date) FROM reservations')
+                           .fetchone())
+    # Move upcoming bookings; an old --db copy may only have past ones
+    movable = conn.execute('''
+        SELECT id, date FROM reservations
+        WHERE is_idle = 0 AND status = 'confirmed'
+    ''').fetchall()
+    upcoming = [row for row in movable if row[1] >= today.isoformat()]
+    movable = upcoming or movable
+    conn.close()
+
+    rng = random.Random(args.seed)
+
+    # Bookings are written into the future even if a --db copy ends earlier
+    booking_last_day = max(last_day, today + timedelta(days=DAYS_AHEAD))
+
+    def random_day(first, last):
+        return first + timedelta(days=rng.randrange(max((last - first).days, 0) + 1))
+
+    def random_slot():
+        start = OPEN_MINUTE + 30 * rng.randrange(24)
+        end = start + 30 * rng.randint(2, 8)
+        return karaoke.minutes_to_time(start), karaoke.minutes_to_time(min(end, 25 * 60))
+
+    def daily_reservations():
+        day = random_day(first_day, last_day)
+        return 'GET', f'/api/daily_reservations?date={day.isoformat()}', None
+
+    def calendar_availability():
+        # A month grid as the calendar view requests it
+        day = random_day(first_day, last_day - timedelta(days=41))
+        end = day + timedelta(days=41)
+        return 'GET', (f'/api/calendar_availability?start={day.isoformat()}'
+                       f'&end={end.isoformat()}'), None
+
+    def create_reservation():
+        start_time, end_time = random_slot()
+        return 'POST', '/reservation', {
+            'date': random_day(today + timedelta(days=1), booking_last_day).isoformat(),
+            'start_time': start_time,
+            'end_time': end_time,
+            'num_people': rng.randint(1, 6),
+            'contact_name': 'Bench',
+            'contact_phone': '5550000000',
+            'room_id': rng.choice(room_ids),
+            'language': 'en',
+        }
+
+    def move_reservation():
+        reservation_id, day = rng.choice(movable)
+        return 'POST', '/move_reservation', {
+            'reservation_id': reservation_id,
+            'room_id': rng.choice(room_ids),
+            'start_time': random_slot()[0],
+            'date': day,
+        }
+
+    def price_estimate():
+        start_time, end_time = random_slot()
+        return 'POST', '/api/price_estimate', {
+            'start_time': start_time,
+            'end_time': end_time,
+            'room_id': rng.choice(room_ids),
+            'date': random_day(today, booking_last_day).isoformat(),
+        }
+
+    scenarios = [
+        ('GET /api/daily_reservations', daily_reservations),
+        ('GET /api/calendar_availability', calendar_availability),
+        ('POST /reservation', create_reservation),
+        ('POST /move_reservation', move_reservation),
+        ('POST /api/price_estimate', price_estimate),
+    ]
+    if not movable:
+        scenarios = [scenario for scenario in scenarios
+                     if scenario[1] is not move_reservation]
+
+    # The app counts statements per request in g.sql_stats
+    last_queries = []
+
+    def capture_queries(sender, response, **extra):
+        last_queries.append(g.sql_stats[0])
+
+    request_finished.connect(capture_queries, karaoke.app)
+    client = karaoke.app.test_client()
+
+    endpoints = {}
+    for name, make_request in scenarios:
+        samples = []
+        for iteration in range(args.warmup + args.requests):
+            method, url, body = make_request()
+            last_queries.clear()
+            request_started = time.perf_counter()
+            response = client.open(url, method=method, json=body)
+            response.get_data()
+            elapsed = time.perf_counter() - request_started
+            if iteration >= args.warmup:
+                samples.append((elapsed, last_queries[-1] if last_queries else 0,
+                                response.status_code))
+        endpoints[name] = summarize(samples)
+
+    report = {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'revision': git_revision(),
+        'python': platform.python_version(),
+        'sqlite': sqlite3.sqlite_version,
+        'config': {
+            'rooms': len(room_ids),
+            'years': None if args.db else args.years,
+            'seed': args.seed,
+            'db': args.db,
+            'reservations': reservation_count,
+            'requests': args.requests,
+            'warmup': args.warmup,
+            'setup_seconds': round(setup_seconds, 2),
+        },
+        'endpoints': endpoints,
+    }
+
+    shutil.rmtree(workdir, ignore_errors=True)
+
+    output = json.dumps(report, indent=2)
+    print(output)
+    if output_path:
+        with open(output_path, 'w') as f:
+            f.write(output + '\n')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+"""
+Micro-benchmark for the "HH:MM" time codec.
+
+Compares the table-backed parse_time_safe() / time_to_minutes() /
+minutes_to_time() in app.py with the strptime-based parse_time_safe()
+they replaced, over every quarter hour of the business day including
+overnight "24:00"-"25:00" values.
+
+Usage:
+    python benchmarks/bench_time_codec.py [--repeat 5] [--number 200]
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import timeit
+from datetime import datetime
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def strptime_parse_time_safe(time_str):
+    """The previous parse_time_safe(), kept here as the baseline."""
+    try:
+        return datetime.strptime(time_str, '%H:%M'), False
+    except ValueError:
+        if ':' in time_str:
+            hours, minutes = time_str.split(':')
+            if int(hours) >= 24:
+                normalized_hour = int(hours) % 24
+                normalized_time_str = f"{normalized_hour:02d}:{minutes}"
+                return datetime.strptime(normalized_time_str, '%H:%M'), True
+        raise
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().split('\n')[0])
+    parser.add_argument('--repeat', type=int, default=5,
+                        help='timing runs per case; the best one is reported')
+    parser.add_argument('--number', type=int, default=200,
+                        help='passes over the sample times per run')
+    args = parser.parse_args()
+
+    # Importing app initializes the database relative to cwd
+    workdir = tempfile.mkdtemp(prefix='karaoke-bench-')
+    os.chdir(workdir)
+    sys.path.insert(0, REPO_ROOT)
+    import app as karaoke
+
+    samples = [karaoke.minutes_to_time(minutes) for minutes in
+               range(karaoke.OPEN_MINUTE, karaoke.CLOSE_MINUTE + 1, 15)]
+    minutes = [karaoke.time_to_minutes(time_str) for time_str in samples]
+
+    # Both parsers must agree before their speed is worth comparing
+    for time_str in samples:
+        assert karaoke.parse_time_safe(time_str) == \
+            strptime_parse_time_safe(time_str), time_str
+
+    cases = [
+        ('strptime parse_time_safe',
+         lambda: [strptime_parse_time_safe(t) for t in samples]),
+        ('parse_time_safe',
+         lambda: [karaoke.parse_time_safe(t) for t in samples]),
+        ('time_to_minutes',
+         lambda: [karaoke.time_to_minutes(t) for t in samples]),
+        ('minutes_to_time',
+         lambda: [karaoke.minutes_to_time(m) for m in minutes]),
+    ]
+
+    calls = len(samples) * args.number
+    baseline = None
+    for name, func in cases:
+        best = min(timeit.repeat(func, repeat=args.repeat, number=args.number))
+        per_call = best / calls * 1e9
+        baseline = baseline or per_call
+        print(f'{name:<26} {per_call:8.0f} ns/call  '
+              f'{baseline / per_call:6.1f}x')
+
+    shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
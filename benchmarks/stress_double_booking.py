@@ -0,0 +1,92 @@
+"""
+Concurrency stress test for the booking path.
+
+Fires many simultaneous POST /reservation requests at the same room and
+time slot against a temporary copy of the database and checks that
+exactly one of them succeeds.
+
+Usage:
+    python benchmarks/stress_double_booking.py [--workers 200] [--db karaoke.db]
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import threading
+from datetime import date, timedelta
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().split('\n')[0])
+    parser.add_argument('--workers', type=int, default=200,
+                        help='number of parallel bookings to fire')
+    parser.add_argument('--db', default=os.path.join(REPO_ROOT, 'karaoke.db'),
+                        help='database to copy for the run')
+    args = parser.parse_args()
+
+    # Run against a throwaway copy; app.py opens DATABASE relative to cwd
+    workdir = tempfile.mkdtemp(prefix='karaoke-stress-')
+    if os.path.exists(args.db):
+        shutil.copy(args.db, os.path.join(workdir, 'karaoke.db'))
+    os.chdir(workdir)
+    sys.path.insert(0, REPO_ROOT)
+
+    import app as karaoke
+
+    # Switch threads as often as possible so check-then-write races surface
+    sys.setswitchinterval(1e-6)
+
+    booking_date = (date.today() + timedelta(days=30)).strftime('%Y-%m-%d')
+    barrier = threading.Barrier(args.workers)
+    statuses = []
+    lock = threading.Lock()
+
+    def book(worker):
+        client = karaoke.app.test_client()
+        barrier.wait()
+        response = client.post('/reservation', json={
+            'date': booking_date,
+            'start_time': '20:00',
+            'end_time': '22:00',
+            'num_people': 4,
+            'contact_name': f'Stress {worker}',
+            'contact_phone': '5550000000',
+            'room_id': 1,
+            'language': 'en'
+        })
+        with lock:
+            statuses.append(response.status_code)
+
+    threads = [threading.Thread(target=book, args=(worker,))
+               for worker in range(args.workers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    with karaoke.app.app_context():
+        stored = karaoke.get_db().execute('''
+            SELECT COUNT(*) AS count FROM reservations
+            WHERE date = ? AND room_id = 1 AND contact_name LIKE 'Stress %'
+        ''', (booking_date,)).fetchone()['count']
+
+    shutil.rmtree(workdir, ignore_errors=True)
+
+    wins = statuses.count(200)
+    print(f'{args.workers} bookings: {wins} succeeded, '
+          f'{statuses.count(400)} rejected as conflicts, '
+          f'{len(statuses) - wins - statuses.count(400)} errors; '
+          f'{stored} stored')
+
+    if wins != 1 or stored != 1:
+        print('FAIL: expected exactly one booking to win')
+        return 1
+    print('OK')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,174 @@
+"""
+Seeded generator of a synthetic karaoke venue database.
+
+Creates a database from schema.sql with N rooms and M years of bookings
+ending DAYS_AHEAD days after the given date. The bookings are packed back
+to back through the evening in every room, busier on weekends, and
+priced with the app's weekday, weekend and holiday tiers. They include
+overnight slots ending after midnight, reservations parked in the idle
+area, cancellations, and completed and no-show bookings in the past.
+The same seed always produces the same database.
+
+Usage:
+    python benchmarks/venue_data.py venue.db [--rooms 8] [--years 2] [--seed 42]
+"""
+import argparse
+import os
+import random
+import sqlite3
+import sys
+from datetime import date, timedelta
+from functools import lru_cache
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+import migrate  # noqa: E402
+from pricing import pricing_day_type, rate_prefix, room_tiers  # noqa: E402
+
+# Business hours as minutes past midnight, matching app.py
+OPEN_MINUTE = 11 * 60
+CLOSE_MINUTE = 25 * 60
+
+# Bookings continue this far past the end date, so writes have free and
+# taken future slots to hit
+DAYS_AHEAD = 90
+
+DURATIONS = (60, 90, 120, 120, 150, 180, 240)
+NAMES = ('Alex', 'Bao', 'Chen', 'Dana', 'Eli', 'Fatima', 'Gus', 'Hana',
+         'Ivan', 'Jun', 'Kim', 'Lena', 'Minh', 'Noor', 'Omar', 'Priya')
+LANGUAGES = ('en', 'en', 'en', 'zh')
+
+
+def format_minutes(minutes):
+    return f'{minutes // 60:02d}:{minutes % 60:02d}'
+
+
+def room_rows(rooms, rng):
+    """Rooms 1..rooms with a mix of sizes; bigger rooms cost more."""
+    rows = []
+    for room_id in range(1, rooms + 1):
+        capacity = rng.choice((6, 8, 8, 12, 20))
+        rate = 25.0 + capacity * 1.25
+        rows.append((room_id, f'Room {room_id}', capacity, rate, rate + 15.0))
+    return rows
+
+
+@lru_cache(maxsize=None)
+def room_rate_prefix(rate, peak_rate, day_type):
+    """Rate prefix sums for a room's rates, as get_rate_schedule builds them."""
+    tiers = room_tiers({'hourly_rate': rate, 'peak_hour_rate': peak_rate},
+                       day_type)
+    return rate_prefix(tiers, CLOSE_MINUTE)
+
+
+def day_bookings(day, room, rng, today):
+    """Yield reservation rows for one room on one day."""
+    room_id, _, capacity, rate, peak_rate = room
+    weekend = day.weekday() >= 5
+    # Quiet afternoons: the first booking starts later on weekdays
+    minute = OPEN_MINUTE + rng.choice((0, 60, 120, 180, 300) if weekend
+                                      else (120, 240, 360, 420, 480))
+    date_str = day.isoformat()
+    prefix = room_rate_prefix(rate, peak_rate, pricing_day_type(date_str))
+
+    while True:
+        minute += rng.choice((0, 0, 30, 60, 90))
+        duration = rng.choice(DURATIONS)
+        if minute + duration > CLOSE_MINUTE:
+            break
+        if rng.random() < (0.15 if weekend else 0.35):
+            minute += duration
+            continue
+
+        start, end = minute, minute + duration
+        minute = end
+
+        # Pre-tax room rate, as the app stores it
+        cost = round((prefix[end] - prefix[start]) / 60, 2)
+
+        status = 'confirmed'
+        roll = rng.random()
+        if roll < 0.06:
+            status = 'cancelled'
+        elif day < today:
+            status = 'no_show' if roll < 0.09 else 'completed'
+
+        yield (room_id, date_str, format_minutes(start), format_minutes(end),
+               start, end, rng.choice(NAMES), f'555{rng.randrange(10 ** 7):07d}',
+               None, rng.randint(1, capacity), rng.choice(LANGUAGES), status,
+               cost, 0.0, None, 0)
+
+    # A couple of walk-ins parked in the idle area on busy days
+    if weekend and rng.random() < 0.2:
+        start = rng.randrange(OPEN_MINUTE, CLOSE_MINUTE - 120, 30)
+        yield (room_id, date_str, format_minutes(start), format_minutes(start + 120),
+               start, start + 120, rng.choice(NAMES), f'555{rng.randrange(10 ** 7):07d}',
+               None, rng.randint(1, capacity), 'en', 'confirmed', 0.0, 0.0,
+               'waiting for a room', 1)
+
+
+def generate_venue(path, rooms=8, years=2, seed=42, today=None):
+    """
+    Write a synthetic venue to a new database at path and return the number
+    of reservations created.
+    """
+    if os.path.exists(path):
+        raise FileExistsError(path)
+    today = today or date.today()
+    rng = random.Random(seed)
+
+    conn = sqlite3.connect(path)
+    with open(os.path.join(REPO_ROOT, 'schema.sql')) as f:
+        conn.executescript(f.read())
+    migrate.stamp(conn)
+
+    venue_rooms = room_rows(rooms, rng)
+    conn.execute('DELETE FROM rooms WHERE id > 0')
+    conn.executemany('''
+        INSERT INTO rooms (id, name, capacity, hourly_rate, peak_hour_rate)
+        VALUES (?, ?, ?, ?, ?)
+    ''', venue_rooms)
+
+    last_day = today + timedelta(days=DAYS_AHEAD)
+    day = last_day - timedelta(days=365 * years)
+    count = 0
+    while day <= last_day:
+        rows = [row for room in venue_rooms
+                for row in day_bookings(day, room, rng, today)]
+        conn.executemany('''
+            INSERT INTO reservations
+            (room_id, date, start_time, end_time, start_min, end_min,
+             contact_name, contact_phone, contact_email, num_people, language,
+             status, total_cost, deposit_paid, notes, is_idle)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', rows)
+        count += len(rows)
+        day += timedelta(days=1)
+
+    # Parked reservations need their idle area entry, as move_to_idle writes
+    conn.execute('''
+        INSERT INTO idle_reservations (reservation_id, date)
+        SELECT id, date FROM reservations WHERE is_idle = 1 ORDER BY id
+    ''')
+
+    # The rollups are rebuilt by the app when it finds them empty
+    conn.commit()
+    conn.close()
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().split('\n')[0])
+    parser.add_argument('path', help='database file to create')
+    parser.add_argument('--rooms', type=int, default=8)
+    parser.add_argument('--years', type=int, default=2)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    count = generate_venue(args.path, args.rooms, args.years, args.seed)
+    print(f'{args.path}: {args.rooms} rooms, {count} reservations')
+
+
+if __name__ == '__main__':
+    main()
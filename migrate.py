@@ -0,0 +1,521 @@
+"""
+Versioned schema migrations for karaoke.db.
+
+Migrations live in migrations/ as NNNN_description.sql or .py files and
+run in version order. Each applied migration is recorded in the
+schema_version table with a checksum of its file, so an edited migration
+is refused instead of silently diverging between databases.
+
+Three kinds of migration are supported:
+
+* .sql scripts, run statement by statement in one transaction.
+* .py modules defining upgrade(conn), run in one transaction. A module
+  may also define BACKFILL = (table, assignments, where) to fill in rows
+  afterwards in batches of committed transactions.
+* .sql table rebuilds, marked with a "-- rebuild: <table>" first line and
+  holding the table's new CREATE TABLE statement. The rows are copied in
+  batches of committed transactions while triggers mirror concurrent
+  writes, so the table stays writable until a short final swap. Columns
+  are copied by name, so the new definition may add or reorder columns.
+
+Usage:
+    python migrate.py [--db karaoke.db] [--dry-run] [--batch-size 5000]
+"""
+import argparse
+import hashlib
+import importlib.util
+import math
+import os
+import re
+import sqlite3
+import sys
+import time
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                              'migrations')
+
+# Rows copied per transaction by table rebuilds
+REBUILD_BATCH_SIZE = 5000
+
+MIGRATION_FILE_RE = re.compile(r'^(\d+)_(\w+)\.(sql|py)$')
+REBUILD_HEADER_RE = re.compile(r'^--\s*rebuild:\s*(\w+)\s*$', re.MULTILINE)
+
+
+class MigrationError(Exception):
+    """Raised when the migrations on disk don't match the database."""
+
+
+class Migration:
+    """One migration file."""
+
+    def __init__(self, version, name, path):
+        self.version = version
+        self.name = name
+        self.path = path
+        with open(path, 'rb') as f:
+            source = f.read()
+        self.checksum = hashlib.sha256(source).hexdigest()
+        self.source = source.decode('utf-8')
+
+        self.table = None
+        if path.endswith('.py'):
+            self.kind = 'python'
+        else:
+            header = REBUILD_HEADER_RE.match(self.source)
+            self.kind = 'rebuild' if header else 'sql'
+            if header:
+                self.table = header.group(1)
+
+    def statements(self):
+        """Split a .sql migration into complete statements."""
+        statements = []
+        current = ''
+        for line in self.source.splitlines(keepends=True):
+            if not current and (not line.strip() or line.lstrip().startswith('--')):
+                continue
+            current += line
+            if sqlite3.complete_statement(current):
+                statements.append(current.strip())
+                current = ''
+        if current.strip():
+            raise MigrationError(f'{self.path}: incomplete SQL statement')
+        return statements
+
+
+def load_migrations(directory=MIGRATIONS_DIR):
+    """Return the migrations in a directory, ordered by version."""
+    migrations = {}
+    for filename in sorted(os.listdir(directory)):
+        match = MIGRATION_FILE_RE.match(filename)
+        if not match:
+            continue
+        version = int(match.group(1))
+        if version in migrations:
+            raise MigrationError(f'Duplicate migration version {version}')
+        migrations[version] = Migration(version, match.group(2),
+                                        os.path.join(directory, filename))
+    return [migrations[version] for version in sorted(migrations)]
+
+
+def ensure_version_table(conn):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER PRIMARY KEY,
+            name TEXT NOT NULL,
+            checksum TEXT NOT NULL,
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    conn.commit()
+
+
+def pending_migrations(conn, migrations):
+    """Return the migrations not yet applied, checking the applied ones' checksums."""
+    ensure_version_table(conn)
+    applied = {version: checksum for version, checksum in
+               conn.execute('SELECT version, checksum FROM schema_version')}
+
+    for migration in migrations:
+        if migration.version in applied and applied[migration.version] != migration.checksum:
+            raise MigrationError(
+                f'Migration {migration.version} ({migration.name}) was changed '
+                f'after it was applied; add a new migration instead')
+    return [migration for migration in migrations
+            if migration.version not in applied]
+
+
+def record_migration(conn, migration):
+    conn.execute('''
+        INSERT INTO schema_version (version, name, checksum) VALUES (?, ?, ?)
+    ''', (migration.version, migration.name, migration.checksum))
+
+
+def stamp(conn, migrations=None):
+    """
+    Mark every migration as applied without running it.
+    Used for a database just created from schema.sql, which already has
+    the latest schema.
+    """
+    migrations = load_migrations() if migrations is None else migrations
+    pending = pending_migrations(conn, migrations)
+    for migration in pending:
+        record_migration(conn, migration)
+    conn.commit()
+
+
+def table_columns(conn, table):
+    return [row[1] for row in conn.execute(f'PRAGMA table_info("{table}")')]
+
+
+def rebuild_plan(conn, migration):
+    """Return (temporary table DDL, copied columns, dropped columns, extra statements)."""
+    statements = migration.statements()
+    create, extra = statements[0], statements[1:]
+    create_re = re.compile(
+        rf'^CREATE\s+TABLE\s+(IF\s+NOT\s+EXISTS\s+)?"?{migration.table}"?(?=\s*\()',
+        re.IGNORECASE)
+    if not create_re.match(create):
+        raise MigrationError(
+            f'{migration.path}: must start with CREATE TABLE {migration.table}')
+
+    temp_table = f'_rebuild_{migration.table}'
+    temp_create = create_re.sub(f'CREATE TABLE "{temp_table}"', create, count=1)
+
+    old_columns = table_columns(conn, migration.table)
+    if not old_columns:
+        raise MigrationError(f'Table {migration.table} does not exist')
+
+    # Read the new columns from a throwaway in-memory copy of the DDL
+    scratch = sqlite3.connect(':memory:')
+    scratch.execute(temp_create)
+    new_columns = table_columns(scratch, temp_table)
+    scratch.close()
+
+    copied = [column for column in new_columns if column in old_columns]
+    dropped = [column for column in old_columns if column not in new_columns]
+    return temp_table, temp_create, copied, dropped, extra
+
+
+def drop_rebuild(conn, table):
+    """Drop the temporary table and triggers of a rebuild of table."""
+    for suffix in ('insert', 'update', 'delete'):
+        conn.execute(f'DROP TRIGGER IF EXISTS "_rebuild_{table}_trigger_{suffix}"')
+    conn.execute(f'DROP TABLE IF EXISTS "_rebuild_{table}"')
+
+
+def rebuild_table(conn, migration, batch_size=REBUILD_BATCH_SIZE, log=print):
+    """
+    Rebuild a table to a new definition without blocking writers.
+
+    1. Create the new table under a temporary name, plus triggers that
+       replay every insert, update and delete on the old table into it.
+    2. Copy the existing rows in rowid order, batch_size rows per committed
+       transaction, so other connections can write between batches.
+    3. In one short transaction, drop the old table, rename the new one
+       into place and recreate the old table's indexes and triggers.
+    """
+    table = migration.table
+    temp_table, temp_create, columns, dropped, extra = rebuild_plan(conn, migration)
+    if dropped:
+        log(f'  dropping columns: {", ".join(dropped)}')
+
+    column_list = ', '.join(f'"{column}"' for column in columns)
+    new_values = ', '.join(f'NEW."{column}"' for column in columns)
+    trigger = f'_rebuild_{table}_trigger'
+
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        # Leftovers of an interrupted rebuild
+        drop_rebuild(conn, table)
+        conn.execute(temp_create)
+        conn.execute(f'''
+            CREATE TRIGGER "{trigger}_insert" AFTER INSERT ON "{table}" BEGIN
+                INSERT OR REPLACE INTO "{temp_table}" (rowid, {column_list})
+                VALUES (NEW.rowid, {new_values});
+            END
+        ''')
+        conn.execute(f'''
+            CREATE TRIGGER "{trigger}_update" AFTER UPDATE ON "{table}" BEGIN
+                DELETE FROM "{temp_table}" WHERE rowid = OLD.rowid;
+                INSERT OR REPLACE INTO "{temp_table}" (rowid, {column_list})
+                VALUES (NEW.rowid, {new_values});
+            END
+        ''')
+        conn.execute(f'''
+            CREATE TRIGGER "{trigger}_delete" AFTER DELETE ON "{table}" BEGIN
+                DELETE FROM "{temp_table}" WHERE rowid = OLD.rowid;
+            END
+        ''')
+        # Rows added after this point reach the new table through the triggers
+        max_rowid = conn.execute(f'SELECT MAX(rowid) FROM "{table}"').fetchone()[0]
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+    try:
+        last_rowid = None
+        copied = 0
+        while max_rowid is not None:
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                bounds = conn.execute(f'''
+                    SELECT MAX(rowid), COUNT(*) FROM (
+                        SELECT rowid FROM "{table}"
+                        WHERE rowid > COALESCE(?, -9223372036854775808) AND rowid <= ?
+                        ORDER BY rowid LIMIT ?)
+                ''', (last_rowid, max_rowid, batch_size)).fetchone()
+                if not bounds[1]:
+                    conn.commit()
+                    break
+                conn.execute(f'''
+                    INSERT OR REPLACE INTO "{temp_table}" (rowid, {column_list})
+                    SELECT rowid, {column_list} FROM "{table}"
+                    WHERE rowid > COALESCE(?, -9223372036854775808) AND rowid <= ?
+                ''', (last_rowid, bounds[0]))
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            last_rowid = bounds[0]
+            copied += bounds[1]
+            log(f'  copied {copied} rows')
+
+        # Dropping the old table must not cascade into tables referencing it;
+        # the pragma is a no-op inside a transaction, so set it before BEGIN
+        foreign_keys = conn.execute('PRAGMA foreign_keys').fetchone()[0]
+        conn.execute('PRAGMA foreign_keys=OFF')
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            # Indexes and triggers go with the old table; keep their definitions
+            recreate = [sql for (sql,) in conn.execute('''
+                SELECT sql FROM sqlite_master
+                WHERE tbl_name = ? AND type IN ('index', 'trigger')
+                AND sql IS NOT NULL AND name NOT LIKE '\\_rebuild\\_%' ESCAPE '\\'
+            ''', (table,))]
+            has_sequence = conn.execute('''
+                SELECT 1 FROM sqlite_master WHERE name = 'sqlite_sequence'
+            ''').fetchone() is not None
+            sequence = conn.execute(
+                'SELECT seq FROM sqlite_sequence WHERE name = ?',
+                (table,)).fetchone() if has_sequence else None
+
+            conn.execute(f'DROP TABLE "{table}"')
+            conn.execute(f'ALTER TABLE "{temp_table}" RENAME TO "{table}"')
+
+            # Don't hand out ids of rows deleted before the rebuild again
+            if sequence is not None:
+                conn.execute('''
+                    UPDATE sqlite_sequence SET seq = MAX(seq, ?) WHERE name = ?
+                ''', (sequence[0], table))
+
+            for sql in recreate:
+                try:
+                    conn.execute(sql)
+                except sqlite3.OperationalError as e:
+                    # e.g. an index on a column the new definition dropped
+                    log(f'  skipped: {sql.splitlines()[0]} ({e})')
+            for sql in extra:
+                conn.execute(sql)
+
+            record_migration(conn, migration)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.execute(f'PRAGMA foreign_keys={foreign_keys}')
+    except BaseException:
+        # Don't leave triggers slowing down (or failing) writes to the table
+        if conn.in_transaction:
+            conn.rollback()
+        conn.execute('BEGIN IMMEDIATE')
+        drop_rebuild(conn, table)
+        conn.commit()
+        raise
+
+
+def load_module(migration):
+    """Import a .py migration."""
+    spec = importlib.util.spec_from_file_location(
+        f'migration_{migration.version:04d}', migration.path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def backfill_batch(conn, table, assignments, where, batch_size):
+    """Update up to batch_size rows still matching where; returns the count."""
+    return conn.execute(f'''
+        UPDATE "{table}" SET {assignments}
+        WHERE rowid IN (SELECT rowid FROM "{table}" WHERE {where} LIMIT ?)
+    ''', (batch_size,)).rowcount
+
+
+def backfill(conn, table, assignments, where, batch_size=REBUILD_BATCH_SIZE,
+             log=print):
+    """
+    Run UPDATE table SET assignments on every row matching where, batch_size
+    rows per committed transaction. The assignments must make where false,
+    which also lets an interrupted backfill resume where it stopped.
+    """
+    updated = 0
+    while True:
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            count = backfill_batch(conn, table, assignments, where, batch_size)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        if not count:
+            return updated
+        updated += count
+        log(f'  backfilled {updated} rows')
+
+
+def apply_migration(conn, migration, batch_size=REBUILD_BATCH_SIZE, log=print):
+    """
+    Run one migration and record it in schema_version.
+
+    A .py migration may define BACKFILL = (table, assignments, where); the
+    rows are then updated in batches after upgrade(conn) commits, so
+    upgrade() must be safe to run again if the backfill is interrupted.
+    """
+    if migration.kind == 'rebuild':
+        rebuild_table(conn, migration, batch_size, log)
+        return
+
+    module = load_module(migration) if migration.kind == 'python' else None
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        if module is not None:
+            module.upgrade(conn)
+        else:
+            for statement in migration.statements():
+                conn.execute(statement)
+        if getattr(module, 'BACKFILL', None) is None:
+            record_migration(conn, migration)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+    if getattr(module, 'BACKFILL', None) is not None:
+        backfill(conn, *module.BACKFILL, batch_size=batch_size, log=log)
+        conn.execute('BEGIN IMMEDIATE')
+        record_migration(conn, migration)
+        conn.commit()
+
+
+def estimate_migration(conn, migration, batch_size=REBUILD_BATCH_SIZE):
+    """
+    Return (table, rows to copy or backfill, estimated seconds, dropped
+    columns) for a migration without changing the database; table is None
+    for migrations that touch no rows in batches. The estimate times one
+    batch inside a transaction that is rolled back, and is None when that
+    batch can't run before the earlier pending migrations have.
+    """
+    module = load_module(migration) if migration.kind == 'python' else None
+    if migration.kind == 'rebuild':
+        temp_table, temp_create, columns, dropped, _ = rebuild_plan(conn, migration)
+        table = migration.table
+        column_list = ', '.join(f'"{column}"' for column in columns)
+
+        def setup():
+            conn.execute(f'DROP TABLE IF EXISTS "{temp_table}"')
+            conn.execute(temp_create)
+
+        def sample():
+            return conn.execute(f'''
+                INSERT INTO "{temp_table}" (rowid, {column_list})
+                SELECT rowid, {column_list} FROM "{table}"
+                ORDER BY rowid LIMIT ?
+            ''', (batch_size,)).rowcount
+        count_sql = f'SELECT COUNT(*) FROM "{table}"'
+    elif getattr(module, 'BACKFILL', None) is not None:
+        table, assignments, where = module.BACKFILL
+        dropped = []
+
+        def setup():
+            module.upgrade(conn)
+
+        def sample():
+            return backfill_batch(conn, table, assignments, where, batch_size)
+        count_sql = f'SELECT COUNT(*) FROM "{table}" WHERE {where}'
+    else:
+        return None, None, None, []
+
+    conn.execute('BEGIN')
+    try:
+        setup()
+        rows = conn.execute(count_sql).fetchone()[0]
+        started = time.perf_counter()
+        try:
+            sampled = sample()
+        except sqlite3.Error:
+            return table, rows, None, dropped
+        elapsed = time.perf_counter() - started
+    finally:
+        conn.rollback()
+
+    return table, rows, elapsed / max(sampled, 1) * rows, dropped
+
+
+def migrate(conn, dry_run=False, batch_size=REBUILD_BATCH_SIZE, migrations=None,
+            log=print):
+    """
+    Apply every pending migration in order, or with dry_run only report
+    what would run. Returns the pending migrations.
+    """
+    migrations = load_migrations() if migrations is None else migrations
+    pending = pending_migrations(conn, migrations)
+
+    for migration in pending:
+        label = f'{migration.version:04d}_{migration.name} ({migration.kind})'
+        if dry_run:
+            table, rows, seconds, dropped = estimate_migration(
+                conn, migration, batch_size)
+            if table is None:
+                log(f'would apply {label}')
+            else:
+                batches = math.ceil(rows / batch_size)
+                duration = ('unknown until earlier migrations run'
+                            if seconds is None else f'~{seconds:.2f}s')
+                log(f'would apply {label}: ~{rows} rows of {table} '
+                    f'in {batches} batches, {duration}')
+                if dropped:
+                    log(f'  would drop columns: {", ".join(dropped)}')
+            continue
+
+        log(f'applying {label}')
+        started = time.perf_counter()
+        apply_migration(conn, migration, batch_size, log)
+        log(f'  done in {time.perf_counter() - started:.2f}s')
+
+    if not pending:
+        log('database is up to date')
+    elif not dry_run:
+        invalidate_schedule_caches(conn)
+    return pending
+
+
+def invalidate_schedule_caches(conn):
+    """
+    Bump the versions every running app process checks before serving a
+    cached schedule or room catalog, since a migration may have rewritten
+    any date or room (a rooms rebuild bypasses its version triggers).
+    """
+    if conn.execute('''
+        SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'schedule_versions'
+    ''').fetchone():
+        conn.execute('''
+            INSERT INTO schedule_versions (date, version) VALUES ('*', 1), ('rooms', 1)
+            ON CONFLICT (date) DO UPDATE SET version = version + 1
+        ''')
+        conn.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().split('\n')[0])
+    parser.add_argument('--db', default='karaoke.db', help='database file')
+    parser.add_argument('--dry-run', action='store_true',
+                        help='report pending migrations with row counts and '
+                             'estimated durations without applying them')
+    parser.add_argument('--batch-size', type=int, default=REBUILD_BATCH_SIZE,
+                        help='rows copied per transaction by table rebuilds')
+    args = parser.parse_args()
+
+    conn = sqlite3.connect(args.db)
+    try:
+        migrate(conn, dry_run=args.dry_run, batch_size=args.batch_size)
+    except MigrationError as e:
+        print(f'error: {e}', file=sys.stderr)
+        return 1
+    finally:
+        conn.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
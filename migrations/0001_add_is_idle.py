@@ -0,0 +1,14 @@
+"""Add reservations.is_idle and backfill it from idle_reservations."""
+
+
+def upgrade(conn):
+    columns = {row[1] for row in conn.execute('PRAGMA table_info(reservations)')}
+    if 'is_idle' in columns:
+        return
+
+    conn.execute(
+        'ALTER TABLE reservations ADD COLUMN is_idle INTEGER NOT NULL DEFAULT 0')
+    conn.execute('''
+        UPDATE reservations SET is_idle = 1
+        WHERE id IN (SELECT reservation_id FROM idle_reservations)
+    ''')
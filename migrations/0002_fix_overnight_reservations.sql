@@ -1,8 +1,7 @@
--- Drop the old constraint and add a new one that handles overnight reservations
-PRAGMA foreign_keys=off;
-
--- Create a temporary table with the new schema
-CREATE TABLE reservations_new (
+-- rebuild: reservations
+-- Replace the end_time check with one that allows overnight reservations.
+-- Rows are copied by column name, so deposit_paid and is_idle survive.
+CREATE TABLE reservations (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
     room_id INTEGER NOT NULL,
     date TEXT NOT NULL,
@@ -15,22 +14,12 @@ CREATE TABLE reservations_new (
     language TEXT DEFAULT 'en',
     status TEXT CHECK(status IN ('confirmed', 'cancelled', 'completed', 'no_show')) DEFAULT 'confirmed',
     total_cost REAL NOT NULL,
+    deposit_paid REAL DEFAULT 0.00,
     notes TEXT,
+    is_idle INTEGER NOT NULL DEFAULT 0,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     FOREIGN KEY (room_id) REFERENCES rooms(id),
     CHECK (num_people > 0),
-    CHECK (start_time >= '11:00' AND end_time <= '25:00')
+    CHECK (start_time >= '11:00' AND (end_time <= '25:00' OR end_time <= '01:00'))
 );
-
--- Copy data from the old table to the new one
-INSERT INTO reservations_new 
-SELECT * FROM reservations;
-
--- Drop the old table
-DROP TABLE reservations;
-
--- Rename the new table to the original name
-ALTER TABLE reservations_new RENAME TO reservations;
-
-PRAGMA foreign_keys=on;
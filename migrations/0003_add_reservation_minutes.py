@@ -0,0 +1,28 @@
+"""
+Add integer start_min/end_min columns to reservations and backfill them
+from the "HH:MM" start_time/end_time text.
+"""
+
+
+def minutes_sql(column):
+    return (f"(CAST(substr({column}, 1, instr({column}, ':') - 1) AS INTEGER) * 60"
+            f" + CAST(substr({column}, instr({column}, ':') + 1) AS INTEGER))")
+
+
+START_SQL = minutes_sql('start_time')
+END_SQL = minutes_sql('end_time')
+
+# End times at or before the start (e.g. "01:00") belong to the next day
+BACKFILL = (
+    'reservations',
+    f'''start_min = {START_SQL},
+        end_min = {END_SQL} + CASE WHEN {END_SQL} <= {START_SQL} THEN 1440 ELSE 0 END''',
+    'start_min IS NULL OR end_min IS NULL',
+)
+
+
+def upgrade(conn):
+    columns = {row[1] for row in conn.execute('PRAGMA table_info(reservations)')}
+    for column in ('start_min', 'end_min'):
+        if column not in columns:
+            conn.execute(f'ALTER TABLE reservations ADD COLUMN {column} INTEGER')
@@ -0,0 +1,39 @@
+-- rebuild: reservations
+-- Make start_min/end_min NOT NULL and replace the text time CHECK, which
+-- let almost any end_time through, with one on the integer columns. The
+-- time indexes move to start_min.
+CREATE TABLE reservations (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    room_id INTEGER NOT NULL,
+    date TEXT NOT NULL,
+    start_time TEXT NOT NULL,
+    end_time TEXT NOT NULL,
+    -- start_time/end_time as minutes past midnight; overnight ends run
+    -- past 1440, so "25:00" is 1500. All time comparisons use these.
+    start_min INTEGER NOT NULL,
+    end_min INTEGER NOT NULL,
+    contact_name TEXT NOT NULL,
+    contact_phone TEXT NOT NULL,
+    contact_email TEXT,
+    num_people INTEGER NOT NULL,
+    language TEXT DEFAULT 'en',
+    status TEXT CHECK(status IN ('confirmed', 'cancelled', 'completed', 'no_show')) DEFAULT 'confirmed',
+    total_cost REAL NOT NULL,
+    deposit_paid REAL DEFAULT 0.00,
+    notes TEXT,
+    is_idle INTEGER NOT NULL DEFAULT 0,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (room_id) REFERENCES rooms(id),
+    CHECK (num_people > 0),
+    CHECK (start_min >= 660 AND end_min > start_min AND end_min <= 1500)
+);
+
+DROP INDEX IF EXISTS idx_reservations_date_room_start;
+CREATE INDEX idx_reservations_date_room_start
+    ON reservations (date, room_id, start_min);
+
+DROP INDEX IF EXISTS idx_reservations_active;
+CREATE INDEX idx_reservations_active
+    ON reservations (date, room_id, start_min)
+    WHERE is_idle = 0;
@@ -0,0 +1,66 @@
+"""
+Pricing tiers for karaoke.db rooms.
+
+Kept apart from app.py, which opens the database on import, so scripts
+such as benchmarks/venue_data.py price bookings exactly as the app does.
+"""
+from datetime import datetime
+from itertools import accumulate
+
+# Pricing tiers per day type, see pricing_day_type(), as (label, start
+# minute, end minute, rooms column holding the hourly rate). Weekend prime
+# time starts at 4 PM; holidays are billed at the peak rate all day.
+PRICING_TIERS = {
+    'weekday': [
+        ('Early Bird (11 AM - 6 PM)', 11 * 60, 18 * 60, 'hourly_rate'),
+        ('Prime Time (6 PM - 9 PM)', 18 * 60, 21 * 60, 'peak_hour_rate'),
+        ('Late Night (9 PM - 1 AM)', 21 * 60, 25 * 60, 'peak_hour_rate'),
+    ],
+    'weekend': [
+        ('Daytime (11 AM - 4 PM)', 11 * 60, 16 * 60, 'hourly_rate'),
+        ('Prime Time (4 PM - 9 PM)', 16 * 60, 21 * 60, 'peak_hour_rate'),
+        ('Late Night (9 PM - 1 AM)', 21 * 60, 25 * 60, 'peak_hour_rate'),
+    ],
+    'holiday': [
+        ('Holiday (11 AM - 1 AM)', 11 * 60, 25 * 60, 'peak_hour_rate'),
+    ],
+}
+
+# 'MM-DD' dates priced with the 'holiday' tiers every year
+HOLIDAYS = {
+    '01-01',  # New Year's Day
+    '07-04',  # Independence Day
+    '12-24',  # Christmas Eve
+    '12-25',  # Christmas Day
+    '12-31',  # New Year's Eve
+}
+
+
+def pricing_day_type(date):
+    """Return the PRICING_TIERS key for a 'YYYY-MM-DD' date (or None)."""
+    if date is None:
+        return 'weekday'
+    if date[5:] in HOLIDAYS:
+        return 'holiday'
+    if datetime.strptime(date, '%Y-%m-%d').weekday() >= 5:
+        return 'weekend'
+    return 'weekday'
+
+
+def room_tiers(room, day_type):
+    """Return a day type's tiers as (label, start, end, hourly rate) for a room."""
+    return [(label, tier_start, tier_end, room[column])
+            for label, tier_start, tier_end, column in PRICING_TIERS[day_type]]
+
+
+def rate_prefix(tiers, minutes):
+    """
+    Return the prefix sums of the hourly rate of each minute in [0, minutes).
+
+    Minutes outside every tier are billed at the last (late night) rate.
+    The cost of [start, end) is (prefix[end] - prefix[start]) / 60.
+    """
+    rates = [tiers[-1][3]] * minutes
+    for _, tier_start, tier_end, rate in tiers:
+        rates[tier_start:tier_end] = [rate] * (tier_end - tier_start)
+    return list(accumulate(rates, initial=0))
@@ -18,6 +18,10 @@ CREATE TABLE IF NOT EXISTS reservations (
     date TEXT NOT NULL,
     start_time TEXT NOT NULL,
     end_time TEXT NOT NULL,
+    -- start_time/end_time as minutes past midnight; overnight ends run
+    -- past 1440, so "25:00" is 1500. All time comparisons use these.
+    start_min INTEGER NOT NULL,
+    end_min INTEGER NOT NULL,
     contact_name TEXT NOT NULL,
     contact_phone TEXT NOT NULL,
     contact_email TEXT,
@@ -27,11 +31,31 @@ CREATE TABLE IF NOT EXISTS reservations (
     total_cost REAL NOT NULL,
     deposit_paid REAL DEFAULT 0.00,
     notes TEXT,
+    is_idle INTEGER NOT NULL DEFAULT 0,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     FOREIGN KEY (room_id) REFERENCES rooms(id),
     CHECK (num_people > 0),
-    CHECK (start_time >= '11:00' AND (end_time <= '25:00' OR end_time <= '01:00'))
+    CHECK (start_min >= 660 AND end_min > start_min AND end_min <= 1500)
+);
+
+-- Availability lookups read one room's bookings for one day, ordered by start
+CREATE INDEX IF NOT EXISTS idx_reservations_date_room_start
+    ON reservations (date, room_id, start_min);
+
+-- Conflict checks only look at reservations that are not parked in idle
+CREATE INDEX IF NOT EXISTS idx_reservations_active
+    ON reservations (date, room_id, start_min)
+    WHERE is_idle = 0;
+
+-- Per-day, per-room occupancy rollup, rewritten by every reservation write
+CREATE TABLE IF NOT EXISTS daily_stats (
+    date TEXT NOT NULL,
+    room_id INTEGER NOT NULL,
+    reservation_count INTEGER NOT NULL DEFAULT 0,
+    active_count INTEGER NOT NULL DEFAULT 0,
+    booked_minutes INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (date, room_id)
 );
 
 -- Only insert default rooms if the table is empty
@@ -59,4 +83,96 @@ CREATE TABLE IF NOT EXISTS idle_reservations (
     date TEXT NOT NULL,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     FOREIGN KEY (reservation_id) REFERENCES reservations(id)
-);
\ No newline at end of file
+);
+-- Standing bookings that repeat every interval_weeks weeks on start_date's
+-- weekday until end_date (or indefinitely). Occurrences are expanded on
+-- the fly, never stored as reservations rows.
+CREATE TABLE IF NOT EXISTS recurring_reservations (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    room_id INTEGER NOT NULL,
+    start_date TEXT NOT NULL,
+    end_date TEXT,
+    interval_weeks INTEGER NOT NULL DEFAULT 1,
+    start_time TEXT NOT NULL,
+    end_time TEXT NOT NULL,
+    contact_name TEXT NOT NULL,
+    contact_phone TEXT NOT NULL,
+    contact_email TEXT,
+    num_people INTEGER NOT NULL,
+    language TEXT DEFAULT 'en',
+    notes TEXT,
+    total_cost REAL NOT NULL,
+    status TEXT CHECK(status IN ('active', 'cancelled')) DEFAULT 'active',
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (room_id) REFERENCES rooms(id),
+    CHECK (interval_weeks > 0),
+    CHECK (num_people > 0)
+);
+
+-- Series running on a date, optionally in one room, are looked up by
+-- status, room and start date, skipping cancelled series
+CREATE INDEX IF NOT EXISTS idx_recurring_reservations_active
+    ON recurring_reservations (status, room_id, start_date);
+
+-- Single occurrences of a series that were skipped, or moved to another
+-- date, room or time
+CREATE TABLE IF NOT EXISTS recurring_exceptions (
+    recurring_id INTEGER NOT NULL,
+    date TEXT NOT NULL,
+    action TEXT NOT NULL CHECK(action IN ('skip', 'move')),
+    new_date TEXT,
+    new_room_id INTEGER,
+    new_start_time TEXT,
+    new_end_time TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (recurring_id, date),
+    FOREIGN KEY (recurring_id) REFERENCES recurring_reservations(id)
+);
+
+-- Moved occurrences are looked up by the date they moved to
+CREATE INDEX IF NOT EXISTS idx_recurring_exceptions_new_date
+    ON recurring_exceptions (new_date)
+    WHERE action = 'move';
+
+-- Per-day, per-room, per-status rollup by hour of the business day (24+
+-- after midnight) and pricing tier, rewritten with daily_stats. Revenue is
+-- pre-tax; reservation_count counts each booking in the hour it starts.
+CREATE TABLE IF NOT EXISTS hourly_stats (
+    date TEXT NOT NULL,
+    room_id INTEGER NOT NULL,
+    status TEXT NOT NULL,
+    hour INTEGER NOT NULL,
+    tier TEXT NOT NULL,
+    reservation_count INTEGER NOT NULL DEFAULT 0,
+    booked_minutes INTEGER NOT NULL DEFAULT 0,
+    revenue REAL NOT NULL DEFAULT 0,
+    PRIMARY KEY (date, room_id, status, hour, tier)
+);
+
+-- Version of each date's cached schedule, bumped inside every write's
+-- transaction so all processes see it; date '*' covers every date and
+-- 'rooms' the cached room catalog and rate schedules
+CREATE TABLE IF NOT EXISTS schedule_versions (
+    date TEXT PRIMARY KEY,
+    version INTEGER NOT NULL DEFAULT 0
+);
+
+-- Any change to rooms, including edits by hand, reloads the room catalog
+-- and every cached schedule, which show room names
+CREATE TRIGGER IF NOT EXISTS rooms_version_insert AFTER INSERT ON rooms
+BEGIN
+    INSERT INTO schedule_versions (date, version) VALUES ('rooms', 1), ('*', 1)
+    ON CONFLICT (date) DO UPDATE SET version = version + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS rooms_version_update AFTER UPDATE ON rooms
+BEGIN
+    INSERT INTO schedule_versions (date, version) VALUES ('rooms', 1), ('*', 1)
+    ON CONFLICT (date) DO UPDATE SET version = version + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS rooms_version_delete AFTER DELETE ON rooms
+BEGIN
+    INSERT INTO schedule_versions (date, version) VALUES ('rooms', 1), ('*', 1)
+    ON CONFLICT (date) DO UPDATE SET version = version + 1;
+END;
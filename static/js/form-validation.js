@@ -271,11 +271,16 @@ function handleReservationSubmit(event) {
       const modal = bootstrap.Modal.getInstance(modalElement);
       if (modal) modal.hide();
 
-      // Refresh the view (timelines and idle area)
+      // Refresh the view (timelines and idle area) unless the live update
+      // stream delivers the change
       const date = document.getElementById("date_value").value;
-      if (typeof window.updateRoomTimelines === "function")
-        window.updateRoomTimelines(date);
-      if (typeof window.updateIdleArea === "function") window.updateIdleArea();
+      if (typeof window.refreshScheduleAfterChange === "function") {
+        window.refreshScheduleAfterChange(date);
+      } else {
+        if (typeof window.updateRoomTimelines === "function")
+          window.updateRoomTimelines(date);
+        if (typeof window.updateIdleArea === "function") window.updateIdleArea();
+      }
     })
     .catch((error) => {
       console.error("Error saving reservation:", error);
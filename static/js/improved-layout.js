@@ -144,21 +144,18 @@ function initDragAndDrop() {
           item.style.height = `${cardHeight}px`;
           item.dataset.roomId = roomId;
 
-          // Call server to remove idle then move
-          fetch(`/remove_from_idle/${reservationId}`, { method: "POST" })
-            .then((r) => r.json())
-            .then(() => {
-              return fetch("/move_reservation", {
-                method: "POST",
-                headers: { "Content-Type": "application/json" },
-                body: JSON.stringify({
-                  reservation_id: reservationId,
-                  room_id: roomId,
-                  start_time: start_time,
-                  date: date,
-                }),
-              });
-            })
+          // The move takes the reservation out of the idle area too, so a
+          // conflicting slot leaves it parked
+          fetch("/move_reservation", {
+            method: "POST",
+            headers: { "Content-Type": "application/json" },
+            body: JSON.stringify({
+              reservation_id: reservationId,
+              room_id: roomId,
+              start_time: start_time,
+              date: date,
+            }),
+          })
             .then((r) => r.json())
             .then((res) => {
               if (res.message) {
@@ -0,0 +1,130 @@
+// Live schedule updates over Server-Sent Events.
+// Subscribes to /api/schedule_events for the date on screen and patches
+// reservation cards in place, so changes made on any tablet show up
+// everywhere without refetching the whole day.
+
+window.liveSchedule = {
+  connected: false,
+  date: null,
+  source: null,
+};
+
+// Open (or move) the event stream to the given YYYY-MM-DD date
+function subscribeLiveSchedule(date) {
+  if (!window.EventSource || !date) return;
+  const live = window.liveSchedule;
+  if (live.source && live.date === date) return;
+
+  if (live.source) live.source.close();
+  live.date = date;
+  live.connected = false;
+  live.source = new EventSource(
+    `/api/schedule_events?date=${encodeURIComponent(date)}`
+  );
+
+  live.source.onopen = function () {
+    live.connected = true;
+  };
+  live.source.onerror = function () {
+    // EventSource reconnects by itself; refetch while we may have missed events
+    live.connected = false;
+  };
+
+  ["created", "updated", "moved", "idled", "restored"].forEach((type) => {
+    live.source.addEventListener(type, (event) =>
+      applyReservationChange(JSON.parse(event.data))
+    );
+  });
+  live.source.addEventListener("deleted", (event) =>
+    removeReservationCard(JSON.parse(event.data).id)
+  );
+  live.source.addEventListener("reload", () => {
+    window.updateRoomTimelines(live.date);
+    window.updateIdleArea();
+  });
+}
+
+// Remove a reservation's card and free the time slots it occupied
+function removeReservationCard(reservationId) {
+  document
+    .querySelectorAll(`.reservation-card[data-reservation-id="${reservationId}"]`)
+    .forEach((card) => card.remove());
+  document
+    .querySelectorAll(`.time-slot[data-reservation-id="${reservationId}"]`)
+    .forEach((slot) => {
+      slot.classList.remove("occupied");
+      delete slot.dataset.reservationId;
+    });
+}
+
+// Redraw a single reservation from its new state
+function applyReservationChange(reservation) {
+  removeReservationCard(reservation.id);
+  if (reservation.status === "cancelled") return;
+
+  const card = {
+    id: reservation.id,
+    name: reservation.contact_name,
+    people: reservation.num_people,
+    phone: "",
+    notes: reservation.notes || "",
+    language: reservation.language || "en",
+    room_id: reservation.room_id,
+    start_time: reservation.start_time,
+    end_time: reservation.end_time,
+  };
+
+  if (reservation.is_idle) {
+    const idleArea =
+      document.getElementById("idle-area") ||
+      document.querySelector(".idle-drop-area");
+    if (!idleArea) return refreshLiveDate();
+    window.createIdleReservationCard(card, idleArea);
+    if (typeof restackIdleCards === "function") restackIdleCards();
+  } else {
+    const timeline =
+      document.querySelector(
+        `.room-timeline[data-room-id="${reservation.room_id}"]`
+      ) ||
+      document.querySelector(
+        `.room-container[data-room-id="${reservation.room_id}"] .room-timeline`
+      );
+    if (!timeline) return refreshLiveDate();
+    window.createReservationCard(card, timeline);
+  }
+
+  if (typeof window.initDragAndDrop === "function") window.initDragAndDrop();
+}
+
+function refreshLiveDate() {
+  window.updateRoomTimelines(window.liveSchedule.date);
+  window.updateIdleArea();
+}
+
+// Refetch the day after a local change unless the stream will deliver it
+function refreshScheduleAfterChange(date) {
+  if (window.liveSchedule.connected && window.liveSchedule.date === date)
+    return;
+  window.updateRoomTimelines(date);
+  window.updateIdleArea();
+}
+
+// Follow the date shown on screen
+const timelinesBeforeLiveUpdates = window.updateRoomTimelines;
+if (typeof timelinesBeforeLiveUpdates === "function") {
+  window.updateRoomTimelines = function (date) {
+    subscribeLiveSchedule(date);
+    return timelinesBeforeLiveUpdates(date);
+  };
+}
+
+document.addEventListener("DOMContentLoaded", function () {
+  subscribeLiveSchedule(
+    window.currentSelectedDate ||
+      window.initialSelectedDate ||
+      new Date().toISOString().split("T")[0]
+  );
+});
+
+window.subscribeLiveSchedule = subscribeLiveSchedule;
+window.refreshScheduleAfterChange = refreshScheduleAfterChange;
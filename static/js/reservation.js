@@ -161,23 +161,7 @@ function handleReservationMove(evt) {
         (timeSlot.dataset.time ? timeSlot.dataset.time.split(":")[1] : 0);
       console.log(`Moving from idle to room ${roomId} at ${hour}:${minute}`);
 
-      // First remove from idle area in the backend
-      fetch(`/remove_from_idle/${reservationId}`, {
-        method: "POST",
-      })
-        .then((response) => response.json())
-        .then((data) => {
-          console.log("Removed from idle area:", data);
-          // Then update the reservation with new time and room
-          moveReservation(reservationId, roomId, hour, minute);
-        })
-        .catch((error) => {
-          console.error("Error removing from idle area:", error);
-          showToast(
-            "Error removing from idle area. Please try again.",
-            "error"
-          );
-        });
+      moveReservation(reservationId, roomId, hour, minute, true);
     } else {
       console.error("No time slot found for the reservation");
       showToast("Error: Could not determine the time slot", "error");
@@ -230,7 +214,7 @@ function handleReservationMove(evt) {
 }
 
 // Function to call the API to move a reservation
-function moveReservation(reservationId, roomId, hour, minute = 0) {
+function moveReservation(reservationId, roomId, hour, minute = 0, fromIdle = false) {
   // Check if we have a valid reservation ID
   if (!reservationId || reservationId === "undefined") {
     console.error("Invalid reservation ID");
@@ -298,10 +282,8 @@ function moveReservation(reservationId, roomId, hour, minute = 0) {
       .then((data) => {
         console.log("Moved to idle area:", data);
         showToast("Reservation moved to idle area");
-        // Refresh the room timelines to show the updated reservation
-        updateRoomTimelines(selectedDate);
-        // Also update the idle area
-        updateIdleArea();
+        // Refresh the schedule unless the live update stream delivers it
+        refreshScheduleAfterChange(selectedDate);
       })
       .catch((error) => {
         console.error("Error moving to idle area:", error);
@@ -312,18 +294,36 @@ function moveReservation(reservationId, roomId, hour, minute = 0) {
     return;
   }
 
+  // A drop from the idle area goes through /move_reservation, which takes
+  // the reservation out of the idle area in the same transaction;
+  // /update_reservation would leave it parked and unchecked for conflicts
+  const [url, body] = fromIdle
+    ? [
+        "/move_reservation",
+        {
+          reservation_id: reservationId,
+          room_id: roomId,
+          start_time: startTime,
+          date: selectedDate,
+        },
+      ]
+    : [
+        `/update_reservation/${reservationId}`,
+        {
+          room_id: roomId,
+          start_time: startTime,
+          end_time: endTime,
+          date: selectedDate,
+        },
+      ];
+
   // Call the API to update the reservation
-  fetch(`/update_reservation/${reservationId}`, {
+  fetch(url, {
     method: "POST",
     headers: {
       "Content-Type": "application/json",
     },
-    body: JSON.stringify({
-      room_id: roomId,
-      start_time: startTime,
-      end_time: endTime,
-      date: selectedDate,
-    }),
+    body: JSON.stringify(body),
   })
     .then((response) => {
       if (!response.ok) {
@@ -343,10 +343,8 @@ function moveReservation(reservationId, roomId, hour, minute = 0) {
       console.log("Reservation updated successfully:", data);
       // Show success message
       showToast("Reservation updated successfully!");
-      // Refresh the room timelines to show the updated reservation
-      updateRoomTimelines(selectedDate);
-      // Also update the idle area
-      updateIdleArea();
+      // Refresh the schedule unless the live update stream delivers it
+      refreshScheduleAfterChange(selectedDate);
     })
     .catch((error) => {
       console.error("Error updating reservation:", error);
@@ -0,0 +1,38 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+# app.py opens karaoke.db relative to cwd and initializes it on import, so
+# the tests get a fresh database in a throwaway directory
+os.chdir(tempfile.mkdtemp(prefix='karaoke-test-'))
+
+import app as karaoke  # noqa: E402
+
+
+@pytest.fixture
+def client():
+    return karaoke.app.test_client()
+
+
+@pytest.fixture
+def book(client):
+    """Create a reservation through POST /reservation and return the response."""
+    def book(date, start_time, end_time, room_id=1, **fields):
+        body = {
+            'date': date,
+            'start_time': start_time,
+            'end_time': end_time,
+            'num_people': 2,
+            'contact_name': 'Test',
+            'contact_phone': '5550000000',
+            'room_id': room_id,
+            'language': 'en',
+        }
+        body.update(fields)
+        return client.post('/reservation', json=body)
+    return book
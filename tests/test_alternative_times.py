@@ -0,0 +1,23 @@
+def alternatives(client, **body):
+    response = client.post('/api/alternative_times', json=body)
+    assert response.status_code == 200
+    return [(alternative['room_id'], alternative['start_time'])
+            for alternative in response.get_json()['alternatives']]
+
+
+def test_same_time_in_another_room_is_offered_first(client, book):
+    assert book('2030-03-04', '20:00', '22:00', room_id=1).status_code == 200
+
+    offered = alternatives(client, date='2030-03-04', start_time='20:00',
+                           end_time='22:00', room_id=1)
+
+    assert offered[:2] == [(2, '20:00'), (3, '20:00')]
+    assert (1, '20:00') not in offered
+
+
+def test_requested_time_is_skipped_in_every_room_without_a_room(client):
+    offered = alternatives(client, date='2030-03-05', start_time='20:00',
+                           end_time='22:00')
+
+    assert offered
+    assert all(start_time != '20:00' for _, start_time in offered)
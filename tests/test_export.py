@@ -0,0 +1,35 @@
+import json
+
+
+def export(client, **args):
+    response = client.get('/api/export', query_string=dict(args, format='ndjson'))
+    assert response.status_code == 200
+    return [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+
+
+def test_export_includes_recurring_occurrences_in_order(client, book):
+    # 2031-09-01 is a Monday
+    response = client.post('/api/recurring_reservations', json={
+        'room_id': 2, 'start_date': '2031-09-01', 'end_date': '2031-09-15',
+        'start_time': '19:00', 'end_time': '21:00', 'num_people': 4,
+        'contact_name': 'Weekly', 'contact_phone': '5551111111'})
+    assert response.status_code == 200
+    series_id = response.get_json()['id']
+    assert book('2031-09-08', '12:00', '14:00', room_id=3).status_code == 200
+
+    rows = export(client, start='2031-09-01', end='2031-09-10')
+
+    assert [(row['date'], row['room_id'], row['recurring_id']) for row in rows] == [
+        ('2031-09-01', 2, series_id),
+        ('2031-09-08', 2, series_id),
+        ('2031-09-08', 3, None),
+    ]
+    occurrence = rows[0]
+    assert occurrence['id'] is None
+    assert occurrence['occurrence_date'] == '2031-09-01'
+    assert occurrence['status'] == 'confirmed'
+    assert occurrence['total'] > occurrence['total_cost'] > 0
+
+    assert export(client, start='2031-09-01', end='2031-09-10', status='cancelled') == []
+    assert [row['room_id'] for row in
+            export(client, start='2031-09-01', end='2031-09-10', rooms='3')] == [3]
@@ -0,0 +1,33 @@
+def price_quotes(client, **fields):
+    data = {'date': '2030-04-03', 'room_ids': [1, 2], 'start_times': ['20:00'],
+            'durations': [1, 2]}
+    data.update(fields)
+    return client.post('/api/price_quotes', json=data)
+
+
+def test_quotes_every_combination(client):
+    response = price_quotes(client)
+
+    assert response.status_code == 200
+    assert [(quote['room_id'], quote['end_time'], quote['room_rate'])
+            for quote in response.get_json()['quotes']] == [
+        (1, '21:00', 50.0), (1, '22:00', 100.0),
+        (2, '21:00', 50.0), (2, '22:00', 100.0)]
+
+
+def test_quotes_outside_business_hours_are_rejected(client):
+    # Ends at 1:30 AM, starts before opening, and starts after closing
+    for start_time, durations in (('23:30', [1, 2]), ('10:30', [1]),
+                                  ('24:30', [3])):
+        response = price_quotes(client, start_times=[start_time],
+                                durations=durations)
+        assert response.status_code == 400
+        assert response.get_json()['fields'] == ['start_times', 'durations']
+
+
+def test_idle_and_unknown_rooms_are_rejected(client):
+    for room_ids in ([0], [1, 999]):
+        response = price_quotes(client, room_ids=room_ids)
+        assert response.status_code == 400
+        assert response.get_json() == {'error': 'Unknown room',
+                                       'fields': ['room_ids']}
@@ -0,0 +1,26 @@
+def quote(client, date, start_time, end_time, room_id=1):
+    response = client.post('/api/price_estimate', json={
+        'room_id': room_id, 'start_time': start_time, 'end_time': end_time,
+        'date': date})
+    assert response.status_code == 200
+    return response.get_json()
+
+
+def test_weekend_prime_time_starts_at_four(client):
+    # Friday and Saturday, 4 PM - 6 PM
+    weekday = quote(client, '2030-04-05', '16:00', '18:00')
+    weekend = quote(client, '2030-04-06', '16:00', '18:00')
+
+    assert weekday['room_rate'] == 70.0
+    assert weekend['room_rate'] == 100.0
+    assert [charge['time'] for charge in weekend['period_charges']] == [
+        'Prime Time (4 PM - 9 PM)']
+
+
+def test_holidays_are_billed_at_the_peak_rate(client):
+    # Independence Day and the Thursday after it, noon - 2 PM
+    holiday = quote(client, '2030-07-04', '12:00', '14:00')
+    weekday = quote(client, '2030-07-11', '12:00', '14:00')
+
+    assert weekday['room_rate'] == 70.0
+    assert holiday['room_rate'] == 100.0
@@ -0,0 +1,35 @@
+import sqlite3
+
+import app as karaoke
+
+
+def quote(client, room_id):
+    response = client.post('/api/price_estimate', json={
+        'room_id': room_id, 'start_time': '12:00', 'end_time': '14:00',
+        'date': '2030-04-02'})
+    assert response.status_code == 200
+    return response.get_json()['room_rate']
+
+
+def test_rate_change_from_another_connection_reprices(client):
+    before = quote(client, 3)
+
+    # Another process, or migrate.py, changes the room's rate
+    other = sqlite3.connect(karaoke.DATABASE)
+    with other:
+        other.execute('UPDATE rooms SET hourly_rate = hourly_rate + 10 WHERE id = 3')
+    other.close()
+
+    assert quote(client, 3) == before + 20
+
+
+def test_new_room_is_bookable_without_a_restart(client):
+    other = sqlite3.connect(karaoke.DATABASE)
+    with other:
+        room_id = other.execute('''
+            INSERT INTO rooms (name, capacity, hourly_rate, peak_hour_rate)
+            VALUES ('Room 9', 4, 20.0, 30.0)
+        ''').lastrowid
+    other.close()
+
+    assert quote(client, room_id) == 40.0